@@ -0,0 +1,78 @@
+"""Stable age binning: vectorised age parsing and fixed, cached bin edges"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_AGE_BIN_EDGES = tuple(range(0, 85, 5))  # last edge is open-ended: "80+"
+UNKNOWN_AGE = 'Unknown'
+MAX_PLAUSIBLE_AGE = 120
+
+# Units end at any non-letter, so compact forms like '2y3m' keep both parts
+_YEARS_PATTERN = r'(\d+(?:\.\d+)?)\s*(?:y|yr|yrs|year|years)(?![a-z])'
+_MONTHS_PATTERN = r'(\d+(?:\.\d+)?)\s*(?:m|mo|mos|mth|mths|month|months)(?![a-z])'
+_BARE_NUMBER_PATTERN = r'^(\d+(?:\.\d+)?)$'
+
+
+def _parse_unique_ages(values):
+    """Years as floats for an array of distinct age strings (NaN if unparseable)"""
+    text = pd.Series(values, dtype='string').str.strip().str.lower()
+    years = pd.to_numeric(text.str.extract(_YEARS_PATTERN, expand=False), errors='coerce')
+    months = pd.to_numeric(text.str.extract(_MONTHS_PATTERN, expand=False), errors='coerce')
+    bare = pd.to_numeric(text.str.extract(_BARE_NUMBER_PATTERN, expand=False), errors='coerce')
+
+    has_unit = years.notna() | months.notna()
+    parsed = years.fillna(0) + months.fillna(0) / 12
+    parsed = parsed.where(has_unit, bare)
+    return parsed.where((parsed >= 0) & (parsed <= MAX_PLAUSIBLE_AGE)).to_numpy(dtype=np.float64)
+
+
+def parse_ages(series):
+    """Parse '11', '11 yrs', '6 months', '2y 3m' etc. into years, once per distinct value"""
+    codes, uniques = pd.factorize(series.astype('string'), use_na_sentinel=True)
+    parsed = np.append(_parse_unique_ages(np.asarray(uniques, dtype=object)), np.nan)
+    return pd.Series(parsed[codes], index=series.index, name='age_in_years')  # code -1 -> trailing NaN
+
+
+class AgeBinner:
+    """Fixed bin edges with precomputed labels and categorical dtype
+
+    Bins are [edge_i, edge_i+1) with the last bin open-ended; missing or
+    implausible ages go to an explicit Unknown bucket. Because the labels never
+    depend on the data, counts from different snapshots can simply be added.
+    """
+
+    def __init__(self, edges=DEFAULT_AGE_BIN_EDGES):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        if len(self.edges) < 2 or np.any(np.diff(self.edges) <= 0):
+            raise ValueError("Age bin edges must be strictly increasing with at least two values")
+        labels = [f"{int(lo)}-{int(hi) - 1}" for lo, hi in zip(self.edges[:-1], self.edges[1:])]
+        labels.append(f"{int(self.edges[-1])}+")
+        self.labels = labels + [UNKNOWN_AGE]
+        self.dtype = pd.CategoricalDtype(self.labels, ordered=True)
+        self._unknown_code = len(self.labels) - 1
+
+    def assign(self, years):
+        """Bin an array/Series of ages in years with a single searchsorted pass"""
+        values = np.asarray(years, dtype=np.float64)
+        codes = np.searchsorted(self.edges, values, side='right') - 1
+        codes[np.isnan(values) | (codes < 0)] = self._unknown_code
+        categorical = pd.Categorical.from_codes(codes, dtype=self.dtype)
+        if isinstance(years, pd.Series):
+            return pd.Series(categorical, index=years.index, name='age_group')
+        return categorical
+
+    def counts(self, age_groups):
+        """Counts for every label, including empty bins, in bin order"""
+        return pd.Series(age_groups).value_counts(sort=False).reindex(self.labels, fill_value=0)
+
+    @staticmethod
+    def merge_counts(*counts):
+        """Combine per-snapshot bin counts produced with the same edges"""
+        return sum(counts[1:], counts[0].copy())
+
+
+@lru_cache(maxsize=8)
+def get_age_binner(edges=DEFAULT_AGE_BIN_EDGES):
+    """Shared AgeBinner per edge tuple so labels/dtype are built once"""
+    return AgeBinner(tuple(edges))
@@ -0,0 +1,69 @@
+"""Benchmark parallel normalise+aggregate speedup against worker count
+
+Expect far from linear scaling. Workers only normalise distinct values, so
+per-row work is small, and the parent still copies each source column into
+shared memory once (one memcpy of the text bytes) and concatenates the
+returned codes. On 2M rows of the tiled export, one in-process worker took
+0.42s, of which 0.11s (about 25%) ran in the parent for
+partition_by='rows'. That caps speedup near 1 / (0.25 + 0.75 / 16) = 3.4x
+on 16 cores. partition_by='district' adds a sort and an un-permute in the
+parent (about 55% serial, under 2x). Both figures were measured on a
+single-CPU machine; multi-core runs have not been measured.
+
+Usage: python benchmark_parallel.py [--rows 2000000] [--workers 1 2 4 8 16] [--partition-by rows|district]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from parallel import process_datasets
+
+
+def build_dataset(n_rows, source='all_data.csv'):
+    """Tile the local HPLC export (or synthetic rows) up to a statewide-sized frame"""
+    if os.path.exists(source):
+        seed = pd.read_csv(source, low_memory=False).dropna(subset=['District'])
+    else:
+        rng = np.random.default_rng(42)
+        seed = pd.DataFrame({
+            'Gender': rng.choice(['M', 'F', 'Male', 'Female'], 5000),
+            'District': rng.choice(['Mysuru', 'Kodagu', 'Chamarajanagra', 'Mandya', 'Hassan'], 5000),
+            'Age': rng.choice(['11', '11 yrs', '6 months', '2y 3m', None], 5000),
+            'Pathology stated HPLC RESULT': rng.choice(['Normal', 'Sickle Cell Trait', 'Sickle Cell Disease', None], 5000),
+        })
+    repeats = -(-n_rows // len(seed))
+    hplc = pd.concat([seed] * repeats, ignore_index=True).iloc[:n_rows]
+    hpos = pd.DataFrame({'deviceRatio': np.random.default_rng(0).normal(0.4, 0.08, n_rows)})
+    return hplc, hpos
+
+
+def run(n_rows, worker_counts, partition_by, repeats=3):
+    hplc, hpos = build_dataset(n_rows)
+    print(f"Rows: {len(hplc):,} HPLC / {len(hpos):,} HPOS | CPUs: {os.cpu_count()} | partition_by={partition_by}")
+    print(f"{'workers':>8} {'best (s)':>10} {'speedup':>8} {'efficiency':>11}")
+
+    baseline = None
+    for workers in worker_counts:
+        process_datasets(hplc, hpos, workers=workers, partition_by=partition_by)  # warm the pool
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            process_datasets(hplc, hpos, workers=workers, partition_by=partition_by)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        baseline = baseline or best
+        speedup = baseline / best
+        print(f"{workers:>8} {best:>10.3f} {speedup:>7.2f}x {speedup / workers * 100:>10.0f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--partition-by', choices=['rows', 'district'], default='rows')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    run(args.rows, args.workers, args.partition_by, args.repeats)
@@ -0,0 +1,10 @@
+"""Shared normalisation of patient demographic fields"""
+GENDER_MAP = {
+    'M': 'Male', 'F': 'Female', 'MALE': 'Male', 'FEMALE': 'Female',
+    'NA': 'Unknown', '': 'Unknown', 'NAN': 'Unknown'
+}
+
+
+def normalize_gender(series):
+    """Map free-text gender codes to Male/Female/Unknown"""
+    return series.astype(str).str.strip().str.upper().map(GENDER_MAP).fillna('Unknown')
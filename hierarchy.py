@@ -0,0 +1,164 @@
+"""Precomputed geographic rollups for the District -> Taluk -> Village -> PHC drill-down"""
+import pandas as pd
+
+from hplc_results import NOT_REPORTED, classify_results
+
+GEO_LEVELS = ['District', 'Taluk', 'Village', 'PHC Name']
+HPLC_RESULT_COLUMN = 'Pathology stated HPLC RESULT'
+HPOS_RESULT_COLUMN = 'HPOS Result'
+HPOS_POSITIVE_PATTERN = r'trait|disease|positive|possitive'
+PATH_SEPARATOR = '\x1f'  # joins chart node ids; stripped from names so ids cannot collide
+
+
+def normalize_location(series):
+    """Standardize free-text location names the same way the District chart does"""
+    cleaned = series.astype(str).str.replace(PATH_SEPARATOR, ' ', regex=False).str.strip().str.title()
+    return cleaned.replace({'Nan': 'Unknown', 'None': 'Unknown', '': 'Unknown'}).fillna('Unknown')
+
+
+def _empty_stats():
+    return {'count': 0, 'hplc_mix': {}, 'hpos_tested': 0, 'hpos_positive': 0}
+
+
+class GeoHierarchy:
+    """Rollup tree keyed by location path tuples, e.g. ('Mysuru', 'Hunsur')
+
+    Every node keeps its test count, HPLC result mix and HPOS positivity, and
+    the children of each node are stored explicitly so expanding a node is a
+    dictionary lookup instead of a regroup of the full frame.
+    """
+
+    def __init__(self):
+        self.nodes = {(): _empty_stats()}
+        self.children_of = {(): []}
+
+    @classmethod
+    def from_frame(cls, df):
+        hierarchy = cls()
+        hierarchy.add_rows(df)
+        return hierarchy
+
+    def add_rows(self, df):
+        """Fold new rows into the tree; cost scales with distinct leaves, not total rows"""
+        self._apply(df, sign=1)
+        return self
+
+    def remove_rows(self, df):
+        """Subtract rows that were deleted or are about to be replaced"""
+        self._apply(df, sign=-1)
+        return self
+
+    def apply_changes(self, change):
+        """Consume a snapshot ChangeSet: retract the old rows, then add the new ones"""
+        return self.remove_rows(change.old_rows).add_rows(change.new_rows)
+
+    def _apply(self, df, sign):
+        if df is None or len(df) == 0:
+            return
+        leaves = _leaf_aggregates(df)
+        for row in leaves.itertuples(index=False):
+            path = tuple(row[:len(GEO_LEVELS)])
+            result, count, tested, positive = row[len(GEO_LEVELS):]
+            for depth in range(len(path) + 1):
+                node_path = path[:depth]
+                stats = self.nodes.get(node_path)
+                if stats is None:
+                    stats = self.nodes[node_path] = _empty_stats()
+                    self.children_of[node_path] = []
+                    self.children_of[node_path[:-1]].append(node_path)
+                stats['count'] += sign * count
+                stats['hplc_mix'][result] = stats['hplc_mix'].get(result, 0) + sign * count
+                stats['hpos_tested'] += sign * tested
+                stats['hpos_positive'] += sign * positive
+        if sign < 0:
+            self._prune()
+
+    def _prune(self):
+        """Drop nodes whose rows have all been removed"""
+        empty = [path for path, stats in self.nodes.items() if path and stats['count'] <= 0]
+        for path in sorted(empty, key=len, reverse=True):
+            del self.nodes[path]
+            del self.children_of[path]
+            self.children_of[path[:-1]].remove(path)
+        for stats in self.nodes.values():
+            stats['hplc_mix'] = {k: v for k, v in stats['hplc_mix'].items() if v > 0}
+
+    def stats(self, path=()):
+        return self.nodes[tuple(path)]
+
+    def children(self, path=()):
+        """Summary table for the direct children of a node"""
+        rows = []
+        for child in self.children_of.get(tuple(path), []):
+            stats = self.nodes[child]
+            rows.append(_summary_row(child[-1], stats))
+        frame = pd.DataFrame(rows, columns=_SUMMARY_COLUMNS)
+        return frame.sort_values('Tests', ascending=False, ignore_index=True)
+
+    def to_sunburst_frame(self, root=(), max_depth=2):
+        """Flatten the subtree under ``root`` into ids/parents/values columns for plotly sunburst/treemap
+
+        Only ``max_depth`` levels below ``root`` are walked, so the chart costs
+        the nodes it shows rather than the whole statewide tree.
+        """
+        root = tuple(root)
+        rows = [_chart_row(root, '', self.nodes[root])] if root else []
+        level = [root]
+        for _ in range(max_depth):
+            level = [child for path in level for child in self.children_of.get(path, [])]
+            rows.extend(_chart_row(path, _path_id(path[:-1]), self.nodes[path]) for path in level)
+        return pd.DataFrame(rows, columns=['id', 'parent', 'label', 'level', 'count', 'hpos_positivity'])
+
+
+_SUMMARY_COLUMNS = ['Name', 'Tests', 'HPLC Signed', 'Top HPLC Result', 'HPOS Tested', 'HPOS Positivity (%)']
+
+
+def _positivity(stats):
+    if stats['hpos_tested'] <= 0:
+        return 0.0
+    return round(stats['hpos_positive'] / stats['hpos_tested'] * 100, 1)
+
+
+def _path_id(path):
+    return PATH_SEPARATOR.join(path)
+
+
+def _chart_row(path, parent, stats):
+    return {
+        'id': _path_id(path),
+        'parent': parent,
+        'label': path[-1],
+        'level': GEO_LEVELS[len(path) - 1],
+        'count': stats['count'],
+        'hpos_positivity': _positivity(stats),
+    }
+
+
+def _summary_row(name, stats):
+    signed = {k: v for k, v in stats['hplc_mix'].items() if k != NOT_REPORTED}
+    top_result = max(signed, key=signed.get) if signed else '-'
+    return [name, stats['count'], sum(signed.values()), top_result, stats['hpos_tested'], _positivity(stats)]
+
+
+def _leaf_aggregates(df):
+    """Group rows once at the finest level (location path + HPLC result)"""
+    keys = pd.DataFrame(index=df.index)
+    for level in GEO_LEVELS:
+        keys[level] = normalize_location(df[level]) if level in df.columns else 'Unknown'
+
+    if HPLC_RESULT_COLUMN in df.columns:
+        keys['result'] = classify_results(df[HPLC_RESULT_COLUMN]).astype(str)
+    else:
+        keys['result'] = NOT_REPORTED
+
+    if HPOS_RESULT_COLUMN in df.columns:
+        hpos = df[HPOS_RESULT_COLUMN].astype('string').str.strip()
+        keys['tested'] = (hpos.notna() & (hpos != '')).astype(int)
+        keys['positive'] = hpos.str.contains(HPOS_POSITIVE_PATTERN, case=False, na=False).astype(int)
+    else:
+        keys['tested'] = 0
+        keys['positive'] = 0
+
+    grouped = keys.groupby(GEO_LEVELS + ['result'], sort=False, dropna=False)
+    leaves = grouped.agg(count=('tested', 'size'), tested=('tested', 'sum'), positive=('positive', 'sum'))
+    return leaves.reset_index()
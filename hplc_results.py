@@ -0,0 +1,105 @@
+"""Normalise free-text HPLC results into a controlled vocabulary"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+PATHOLOGY_RESULT_COLUMN = 'Pathology stated HPLC RESULT'
+TECHNICIAN_RESULT_COLUMN = 'Technician stated HPLC Result'
+LAB_COLUMN = 'HPLC Test Performed By'
+
+PATHOLOGY_CLASS_COLUMN = 'hplc_result_class'
+TECHNICIAN_CLASS_COLUMN = 'technician_result_class'
+
+NOT_REPORTED = 'Not Reported'
+UNRECOGNIZED = 'Unrecognized'
+RESULT_CATEGORIES = ['Normal', 'HbAS', 'HbSS', 'HbS-Beta Thal', 'Other Variant', 'Invalid', UNRECOGNIZED, NOT_REPORTED]
+
+# Ordered rules: the first pattern that matches the cleaned text wins
+RESULT_RULES = [
+    (r're-?\s*sampl|repeat|insufficient|clott?ed|h[a]?emoly', 'Invalid'),
+    (r'thal\w*[\s-]+sickle|sickle\w*[\s-]+.*thal|\bs\s*-?\s*beta|hb\s*s\s*/?\s*beta', 'HbS-Beta Thal'),
+    (r'sickle\w*\s+(cell\s+)?(disease|an[a]?emia)|\bhb\s*ss\b|^ss$', 'HbSS'),
+    (r'sickle\w*\s+(cell\s+)?trait|\bhb\s*as\b|\bhb\s*s\s+trait|^as$|carrier', 'HbAS'),
+    (r'^normal|\bhb\s*aa\b|^aa$', 'Normal'),
+    (r'thal|var[ai]{2}nt|\bhb\s*[cdej]\b|\bhbe\b|\bhbd\b', 'Other Variant'),
+]
+_COMPILED_RULES = [(re.compile(pattern), category) for pattern, category in RESULT_RULES]
+
+
+@lru_cache(maxsize=4096)
+def classify_result(text):
+    """Map one raw result string to a RESULT_CATEGORIES label"""
+    cleaned = re.sub(r'\s+', ' ', text).strip().lower()
+    if cleaned in ('', 'nan', 'na', 'none', '-'):
+        return NOT_REPORTED
+    for pattern, category in _COMPILED_RULES:
+        if pattern.search(cleaned):
+            return category
+    return UNRECOGNIZED  # kept apart from real re-sample/haemolysed results
+
+
+def classify_results(series):
+    """Classify each distinct value once and broadcast back to every row"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    labels = [classify_result(str(value)) for value in uniques]
+    category_codes = [RESULT_CATEGORIES.index(label) for label in labels]
+    # Missing values (code -1) take the NOT_REPORTED slot appended at the end
+    category_codes.append(RESULT_CATEGORIES.index(NOT_REPORTED))
+    mapped = np.asarray(category_codes)[codes]
+    return pd.Series(
+        pd.Categorical.from_codes(mapped, categories=RESULT_CATEGORIES),
+        index=series.index,
+        name=f"{series.name}_class" if series.name else None
+    )
+
+
+def unrecognized_results(series, classes=None):
+    """Raw strings no rule matched, with how often each occurs, for extending RESULT_RULES"""
+    classes = classify_results(series) if classes is None else classes
+    unmatched = series[classes == UNRECOGNIZED].astype('string').str.strip()
+    return unmatched.value_counts().rename_axis('Result Text').reset_index(name='Count')
+
+
+def process_hplc_results(df, source=None):
+    """Add classified pathology/technician result columns to df
+
+    ``source`` is an optional frame aligned with df that holds columns df
+    does not carry itself (the technician result is not a dashboard column).
+    """
+    source = df if source is None else source
+    if PATHOLOGY_RESULT_COLUMN in source.columns:
+        df[PATHOLOGY_CLASS_COLUMN] = classify_results(source[PATHOLOGY_RESULT_COLUMN])
+    if TECHNICIAN_RESULT_COLUMN in source.columns:
+        df[TECHNICIAN_CLASS_COLUMN] = classify_results(source[TECHNICIAN_RESULT_COLUMN])
+    return df
+
+
+def disagreement_by_lab(df, source=None, lab_column=LAB_COLUMN):
+    """Pathologist-vs-technician disagreement rate per lab over samples both reported
+
+    Uses the class columns added by process_hplc_results (or the parallel
+    process_datasets); ``source`` is an optional aligned frame holding the
+    lab column when df does not.
+    """
+    columns = ['Lab', 'Both Reported', 'Disagreements', 'Disagreement Rate (%)']
+    if PATHOLOGY_CLASS_COLUMN not in df.columns or TECHNICIAN_CLASS_COLUMN not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    source = df if source is None else source
+    pathology = df[PATHOLOGY_CLASS_COLUMN]
+    technician = df[TECHNICIAN_CLASS_COLUMN]
+    both = (pathology != NOT_REPORTED) & (technician != NOT_REPORTED)
+    if lab_column in source.columns:
+        labs = source[lab_column].astype('string').str.strip().fillna('Unknown')
+    else:
+        labs = pd.Series('Unknown', index=df.index)
+
+    compared = pd.DataFrame({
+        'Lab': labs[both],
+        'disagree': (pathology[both] != technician[both]).astype(int)
+    })
+    summary = compared.groupby('Lab').agg(**{'Both Reported': ('disagree', 'size'), 'Disagreements': ('disagree', 'sum')})
+    summary['Disagreement Rate (%)'] = (summary['Disagreements'] / summary['Both Reported'] * 100).round(1)
+    return summary.reset_index().sort_values('Disagreement Rate (%)', ascending=False, ignore_index=True)[columns]
@@ -0,0 +1,268 @@
+"""Streaming per-device / per-lab quality control for HPOS deviceRatio readings
+
+Each (device, lab) pair keeps Welford running statistics, an EWMA, a two-sided
+CUSUM and a short window of z-scores for the Westgard multi-rules. Every new
+reading updates its group in O(1); nothing is recomputed over the history.
+"""
+import hashlib
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+RATIO_COLUMN = 'deviceRatio'
+DEVICE_COLUMN_CANDIDATES = ['deviceId', 'device_id', 'Device ID', 'deviceSerial', 'serialNumber', 'deviceName', 'Device']
+LAB_COLUMN_CANDIDATES = ['labId', 'labName', 'Lab Name', 'Lab', 'testingCenter', 'centerName', 'PHC Name', 'facility']
+
+QC_DEFAULTS = {
+    'warmup': 50,         # readings used to fix each device's baseline mean/SD
+    'ewma_lambda': 0.2,
+    'ewma_limit': 3.0,    # EWMA control limit in asymptotic sigmas
+    'cusum_k': 0.5,       # CUSUM slack in SDs
+    'cusum_h': 5.0,       # CUSUM decision interval in SDs
+    'history': 200,       # points kept per device for the control chart
+}
+
+WESTGARD_REJECT_RULES = ('1_3s', '2_2s', 'R_4s', '4_1s', '10_x')
+
+
+def find_column(df, candidates):
+    """First column of df matching one of candidates, ignoring case/spacing"""
+    normalized = {str(col).lower().replace(' ', '').replace('_', ''): col for col in df.columns}
+    for candidate in candidates:
+        col = normalized.get(candidate.lower().replace(' ', '').replace('_', ''))
+        if col is not None:
+            return col
+    return None
+
+
+def westgard_violations(z_window):
+    """Westgard rules over recent z-scores, newest last"""
+    violations = []
+    z = z_window[-1]
+    if abs(z) > 3:
+        violations.append('1_3s')
+    if len(z_window) >= 2:
+        prev = z_window[-2]
+        if (z > 2 and prev > 2) or (z < -2 and prev < -2):
+            violations.append('2_2s')
+        if (z > 2 and prev < -2) or (z < -2 and prev > 2):
+            violations.append('R_4s')
+    if len(z_window) >= 4:
+        last4 = list(z_window)[-4:]
+        if all(v > 1 for v in last4) or all(v < -1 for v in last4):
+            violations.append('4_1s')
+    if len(z_window) >= 10:
+        if all(v > 0 for v in z_window) or all(v < 0 for v in z_window):
+            violations.append('10_x')
+    if not violations and abs(z) > 2:
+        violations.append('1_2s')  # warning only
+    return violations
+
+
+class DeviceMonitor:
+    """Running QC state for one (device, lab) group"""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.baseline_mean = None
+        self.baseline_sd = None
+        self.ewma = None
+        self.cusum_pos = 0.0
+        self.cusum_neg = 0.0
+        self.z_window = deque(maxlen=10)
+        self.history = deque(maxlen=settings['history'])
+        self.last_violation = None
+
+    @property
+    def sd(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def update(self, value, index):
+        """Fold one reading in and return the rules it violated"""
+        # Welford running mean/variance over the device's full history
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        violations = []
+        if self.baseline_mean is None:
+            if self.count >= self.settings['warmup'] and self.sd > 0:
+                self.baseline_mean, self.baseline_sd = self.mean, self.sd
+                self.ewma = self.mean
+        else:
+            z = (value - self.baseline_mean) / self.baseline_sd
+            self.z_window.append(z)
+            violations.extend(westgard_violations(self.z_window))
+
+            lam = self.settings['ewma_lambda']
+            self.ewma = lam * value + (1 - lam) * self.ewma
+            ewma_sigma = self.baseline_sd * math.sqrt(lam / (2 - lam))
+            if abs(self.ewma - self.baseline_mean) > self.settings['ewma_limit'] * ewma_sigma:
+                violations.append('EWMA')
+
+            k, h = self.settings['cusum_k'], self.settings['cusum_h']
+            self.cusum_pos = max(0.0, self.cusum_pos + z - k)
+            self.cusum_neg = max(0.0, self.cusum_neg - z - k)
+            if self.cusum_pos > h:
+                violations.append('CUSUM+')
+                self.cusum_pos = 0.0
+            if self.cusum_neg > h:
+                violations.append('CUSUM-')
+                self.cusum_neg = 0.0
+
+        self.history.append((index, value, self.ewma))
+        if any(rule != '1_2s' for rule in violations):
+            self.last_violation = (index, violations)
+        return violations
+
+    def status(self):
+        if self.baseline_mean is None:
+            return 'Warming up'
+        if self.last_violation is not None and self.history and self.last_violation[0] == self.history[-1][0]:
+            return 'Out of control'
+        return 'In control'
+
+
+class QCEngine:
+    """Per-device/per-lab monitors fed incrementally from the HPOS sheet
+
+    ``update`` only consumes rows appended since the previous call. It keeps
+    a digest of the device/lab/ratio cells it has consumed; if the sheet
+    shrinks or any consumed row changes (a corrected reading, a rewritten
+    sheet), the engine resets and replays the frame. One
+    engine is shared by all sessions, so readers copy state under the same
+    lock ``update`` holds.
+    """
+
+    def __init__(self, settings=None, max_alerts=500):
+        self.settings = {**QC_DEFAULTS, **(settings or {})}
+        self.monitors = {}
+        self.alerts = deque(maxlen=max_alerts)
+        self.rows_consumed = 0
+        self._consumed_digest = None
+        self._data_version = None
+        self._lock = threading.Lock()
+
+    def reset(self):
+        self.monitors = {}
+        self.alerts.clear()
+        self.rows_consumed = 0
+        self._consumed_digest = None
+        self._data_version = None
+
+    def update(self, df, data_version=None):
+        """Consume rows appended since the last call; returns the number of new readings
+
+        ``data_version`` identifies the frame's content; when it matches the
+        previous call the consumed-prefix check is skipped.
+        """
+        if df is None or RATIO_COLUMN not in df.columns:
+            return 0
+        with self._lock:
+            if data_version is not None and data_version == self._data_version:
+                return 0
+            hashes = _qc_row_hashes(df)
+            if self.rows_consumed > len(df) or (
+                self.rows_consumed and _digest(hashes[:self.rows_consumed]) != self._consumed_digest
+            ):
+                self.reset()
+            self._data_version = data_version
+            new_rows = df.iloc[self.rows_consumed:]
+            if new_rows.empty:
+                return 0
+
+            devices = _group_labels(new_rows, DEVICE_COLUMN_CANDIDATES, 'Unknown device')
+            labs = _group_labels(new_rows, LAB_COLUMN_CANDIDATES, 'Unknown lab')
+            ratios = pd.to_numeric(new_rows[RATIO_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+
+            readings = 0
+            for offset, (device, lab, value) in enumerate(zip(devices, labs, ratios)):
+                if np.isnan(value):
+                    continue
+                index = self.rows_consumed + offset
+                monitor = self.monitors.get((device, lab))
+                if monitor is None:
+                    monitor = self.monitors[(device, lab)] = DeviceMonitor(self.settings)
+                violations = monitor.update(float(value), index)
+                for rule in violations:
+                    self.alerts.append({
+                        'Sample': index, 'Device': device, 'Lab': lab,
+                        'Ratio': round(float(value), 4), 'Rule': rule,
+                        'Severity': _severity(rule),
+                    })
+                readings += 1
+
+            self.rows_consumed = len(df)
+            self._consumed_digest = _digest(hashes)
+            return readings
+
+    def summary(self):
+        """One row per (device, lab) with current running statistics"""
+        with self._lock:
+            rows = [{
+                'Device': device,
+                'Lab': lab,
+                'Readings': monitor.count,
+                'Mean': round(monitor.mean, 4),
+                'SD': round(monitor.sd, 4),
+                'EWMA': round(monitor.ewma, 4) if monitor.ewma is not None else None,
+                'CUSUM+': round(monitor.cusum_pos, 2),
+                'CUSUM-': round(monitor.cusum_neg, 2),
+                'Status': monitor.status(),
+                'Last Violation': ', '.join(monitor.last_violation[1]) if monitor.last_violation else '',
+            } for (device, lab), monitor in self.monitors.items()]
+        columns = ['Device', 'Lab', 'Readings', 'Mean', 'SD', 'EWMA', 'CUSUM+', 'CUSUM-', 'Status', 'Last Violation']
+        return pd.DataFrame(rows, columns=columns)
+
+    def alert_frame(self, include_warnings=False):
+        with self._lock:
+            alerts = list(self.alerts)
+        alerts = [a for a in reversed(alerts) if include_warnings or a['Severity'] != 'Warning']
+        return pd.DataFrame(alerts, columns=['Sample', 'Device', 'Lab', 'Ratio', 'Rule', 'Severity'])
+
+    def chart_frame(self, device, lab):
+        """Recent points plus baseline limits for one device's control chart
+
+        Empty if the device is gone, e.g. another session reset the engine
+        between reading the summary and drawing the chart.
+        """
+        with self._lock:
+            monitor = self.monitors.get((device, lab))
+            if monitor is None:
+                points, baseline_mean, baseline_sd = [], None, None
+            else:
+                points, baseline_mean, baseline_sd = list(monitor.history), monitor.baseline_mean, monitor.baseline_sd
+        history = pd.DataFrame(points, columns=['Sample', 'Ratio', 'EWMA'])
+        return history, baseline_mean, baseline_sd
+
+
+def _severity(rule):
+    if rule in WESTGARD_REJECT_RULES:
+        return 'Reject'
+    return 'Warning' if rule == '1_2s' else 'Drift'
+
+
+def _group_labels(df, candidates, default):
+    column = find_column(df, candidates)
+    if column is None:
+        return np.full(len(df), default, dtype=object)
+    return df[column].astype('string').str.strip().fillna(default).to_numpy(dtype=object)
+
+
+def _qc_row_hashes(df):
+    """One hash per row over the cells the monitors read: device, lab and ratio"""
+    columns = [RATIO_COLUMN] + [
+        col for col in (find_column(df, DEVICE_COLUMN_CANDIDATES), find_column(df, LAB_COLUMN_CANDIDATES)) if col
+    ]
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def _digest(hashes):
+    return hashlib.blake2b(hashes.tobytes(), digest_size=16).digest()
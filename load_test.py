@@ -0,0 +1,431 @@
+"""Load-testing harness for concurrent dashboard sessions
+
+Serves the HPLC/HPOS sheets from a local stand-in for the Google Sheets CSV
+endpoints, then ramps through increasing numbers of concurrent sessions that
+rerun, switch views, page, search and refresh. For each level it reports
+rerun latency percentiles, the slowdown against the first level (where
+reruns start queueing), CPU per session and memory per added session.
+
+Modes:
+  pipeline  sessions are threads in one process replaying main()'s data path
+            against main.py's own st.cache_data/st.cache_resource stores, so
+            they share the GIL and caches like sessions on one server node
+  apptest   runs main.py headlessly through Streamlit's AppTest, one process
+            per session (AppTest is not thread-safe); this covers the full
+            script but sessions do not share caches, so use it to catch
+            errors rather than to size a node
+
+Usage: python load_test.py [--mode pipeline|apptest] [--sessions 1 2 4 8] [--actions 10] [--rows 50000]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from hierarchy import GeoHierarchy
+from hplc_results import disagreement_by_lab
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+HPOS_PATH = '/hpos.csv'
+HPLC_PATH = '/hplc.csv'
+
+
+def build_sheets(n_rows, source='all_data.csv', seed=7):
+    """CSV payloads for both sheets, tiling the local HPLC export to n_rows"""
+    rng = np.random.default_rng(seed)
+    if os.path.exists(source):
+        hplc = pd.read_csv(source, low_memory=False).dropna(how='all')
+    else:
+        hplc = pd.DataFrame({
+            'SL No.': np.arange(1, 1001),
+            'Sickle Id': [f'SK{i:04d}' for i in range(1, 1001)],
+            'Age': rng.integers(1, 80, 1000).astype(str),
+            'Gender': rng.choice(['M', 'F'], 1000),
+            'District': rng.choice(['Mysuru', 'Kodagu', 'Chamarajanagra'], 1000),
+        })
+    seed_rows = len(hplc)
+    repeats = -(-n_rows // seed_rows)
+    hplc = pd.concat([hplc] * repeats, ignore_index=True).iloc[:n_rows]
+    if 'Sickle Id' in hplc.columns and repeats > 1:
+        copy_number = pd.Series(np.arange(len(hplc)) // seed_rows, index=hplc.index).astype('string')
+        hplc['Sickle Id'] = hplc['Sickle Id'].astype('string') + '-' + copy_number
+
+    n_hpos = max(n_rows // 2, 1)
+    hpos = pd.DataFrame({
+        'deviceId': rng.choice([f'HPOS-{i:02d}' for i in range(12)], n_hpos),
+        'labName': rng.choice(['Mysuru KR Hospital', 'JSS Hospital', 'Kodagu DH'], n_hpos),
+        'deviceRatio': rng.normal(0.40, 0.05, n_hpos).round(4),
+    })
+    return hpos.to_csv(index=False).encode(), hplc.to_csv(index=False).encode()
+
+
+class SheetsStub:
+    """Local HTTP server standing in for the published Google Sheets CSV URLs"""
+
+    def __init__(self, hpos_csv, hplc_csv, latency_ms=0):
+        payloads = {HPOS_PATH: hpos_csv, HPLC_PATH: hplc_csv}
+        delay = latency_ms / 1000
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = payloads.get(self.path.split('?')[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                time.sleep(delay)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/csv')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (current RSS where getrusage is unavailable)"""
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return current_rss_mb()
+
+
+def current_rss_mb():
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2**20
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return float('nan')
+
+
+class RssSampler:
+    """Background sampler for the highest whole-process RSS seen while active"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = current_rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_mb())
+
+
+class AppTestSession:
+    """One headless browser session running main.py through Streamlit's AppTest"""
+
+    def __init__(self, script, timeout, seed=None):
+        from streamlit.testing.v1 import AppTest
+        self.app = AppTest.from_file(script, default_timeout=timeout)
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+
+    def actions(self):
+        app, rng = self.app, self.rng
+        return {
+            'load': lambda: self._checked(app),
+            'search': lambda: self._checked(app.text_input(key='hplc_table_search').input(rng.choice(['PRA', 'MAN', 'nellur', '44']))),
+            'page': lambda: self._checked(app.number_input(key='hplc_table_page').set_value(rng.randint(1, 20))),
+            'sort': lambda: self._checked(app.selectbox(key='hplc_table_sort').select_index(rng.randint(0, 4))),
+            'geo_view': lambda: self._checked(app.radio(key='geo_view').set_value(rng.choice(['Sunburst', 'Treemap']))),
+            'change_window': lambda: self._checked(app.selectbox(key='change_window').select_index(rng.randint(0, 2))),
+            'qc_device': lambda: self._checked(app.selectbox(key='qc_device').select_index(0)),
+            'refresh': lambda: self._checked(app.button(key='refresh_main').click()),
+        }
+
+    def _checked(self, element):
+        """Rerun the script and surface uncaught app exceptions as failures"""
+        element.run(timeout=self.timeout)
+        if self.app.exception:
+            raise RuntimeError(self.app.exception[0].message)
+
+
+class PipelineSession:
+    """One session replaying what a main() rerun does with the data, minus rendering
+
+    ``app`` is the imported main module, so every session in the process goes
+    through the same cached functions and shared resources the script uses.
+    """
+
+    def __init__(self, app, seed=None):
+        self.app = app
+        self.rng = random.Random(seed)  # per session: threads must not share the global generator
+        self.view = {'search': None, 'page': 1, 'sort_by': None, 'geo_path': (), 'change_days': 1, 'qc_row': 0}
+        self.geo_options = []
+
+    def actions(self):
+        rng = self.rng
+        return {
+            'load': self.rerun,
+            'search': lambda: self.rerun(search=rng.choice(['PRA', 'MAN', 'NELLUR', '44'])),
+            'page': lambda: self.rerun(page=rng.randint(1, 20)),
+            'sort': lambda: self.rerun(sort_by=rng.choice([None, 'SL No.', 'Sickle Id', 'Age', 'District'])),
+            'geo_view': lambda: self.rerun(geo_path=tuple(rng.choice(self.geo_options or [()]))),
+            'change_window': lambda: self.rerun(change_days=rng.choice([None, 1, 7])),
+            'qc_device': lambda: self.rerun(qc_row=rng.randint(0, 11)),
+            'refresh': self.refresh,
+        }
+
+    def refresh(self):
+        """The Refresh Data button: clears the shared data caches, then reruns"""
+        self.app.st.cache_data.clear()
+        self.app.build_record_index.clear()
+        self.rerun()
+
+    def rerun(self, **changes):
+        app, view = self.app, self.view
+        view.update(changes)
+        config = app.load_config()
+        hpos_data, hplc_data, data_versions = app.load_data(config['hpos_data_url'], config['hplc_data_path'])
+        hplc_processed, aggregates = app.prepare_hplc_data(
+            hplc_data,
+            hpos_data,
+            (data_versions['hplc'], data_versions['hpos']),
+            (config['hpos_threshold_low'], config['hpos_threshold_high']),
+            config['age_bin_edges'],
+            config['parallel_workers'],
+            config['parallel_min_rows']
+        )
+        disagreement_by_lab(hplc_processed, source=hplc_data)
+
+        store = app.get_snapshot_store()
+        geo = app.get_geo_hierarchy_feed().sync(store) or GeoHierarchy.from_frame(hplc_data)
+        geo_path = view['geo_path'] if view['geo_path'] in geo.nodes else ()
+        geo.to_sunburst_frame(root=geo_path, max_depth=2)
+        geo.children(geo_path)
+        self.geo_options = [(name,) for name in geo.children()['Name']]
+
+        qc = app.get_qc_engine()
+        qc.update(hpos_data, data_versions['hpos'])
+        qc_summary = qc.summary()
+        if len(qc_summary):
+            device, lab = qc_summary.iloc[view['qc_row'] % len(qc_summary)][['Device', 'Lab']]
+            qc.chart_frame(device, lab)
+        qc.alert_frame()
+
+        hplc_index = app.build_record_index(
+            hplc_processed, ('Sickle Id', 'SL No.'), ('Name', 'Village'), ('hplc', data_versions['hplc']), _lookup=hplc_data
+        )
+        hplc_index.query(view['search'], None, view['sort_by'], True, page=view['page'], page_size=50)
+
+        if view['change_days'] is not None:
+            store.diff_since(datetime.now() - timedelta(days=view['change_days']))
+        # The download buttons serialise both frames on every rerun
+        hplc_processed.to_csv(index=False)
+        hpos_data.to_csv(index=False)
+
+
+def run_session(session, n_actions, think_time, refresh_every):
+    """Initial load, then random view changes with a refresh every refresh_every actions"""
+    actions, rng = session.actions(), session.rng
+    timings = []
+    errors = []
+    plan = ['load'] + [
+        'refresh' if refresh_every and i % refresh_every == refresh_every - 1
+        else rng.choice([name for name in actions if name not in ('load', 'refresh')])
+        for i in range(n_actions)
+    ]
+    for name in plan:
+        start = time.perf_counter()
+        try:
+            actions[name]()
+        except Exception as e:  # a missing widget or failed rerun is recorded, not fatal
+            errors.append(f"{name}: {type(e).__name__}: {e}")
+            continue
+        timings.append((name, time.perf_counter() - start))
+        if think_time:
+            time.sleep(rng.uniform(0, think_time))
+    return timings, errors
+
+
+def thread_session(app, n_actions, think_time, refresh_every, seed, results):
+    """Pipeline-mode session thread; CPU is this thread's own time"""
+    cpu_start = time.thread_time()
+    timings, errors = run_session(PipelineSession(app, seed), n_actions, think_time, refresh_every)
+    results.append({'timings': timings, 'errors': errors, 'cpu_seconds': time.thread_time() - cpu_start})
+
+
+def run_threads(app, n_sessions, args):
+    """All sessions as threads of this process, sharing main.py's caches"""
+    results = []
+    threads = [
+        threading.Thread(
+            target=thread_session,
+            args=(app, args.actions, args.think_time, args.refresh_every, args.seed + i, results)
+        )
+        for i in range(n_sessions)
+    ]
+    with RssSampler() as sampler:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return results, sampler.peak
+
+
+def apptest_worker(task):
+    """AppTest-mode session process; CPU and peak RSS are the whole process's"""
+    script, n_actions, think_time, refresh_every, timeout, seed = task
+    cpu_start = time.process_time()
+    timings, errors = run_session(AppTestSession(script, timeout, seed), n_actions, think_time, refresh_every)
+    return {
+        'timings': timings,
+        'errors': errors,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'rss_mb': peak_rss_mb(),
+    }
+
+
+def run_processes(n_sessions, args):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+    tasks = [
+        (script, args.actions, args.think_time, args.refresh_every, args.timeout, args.seed + i)
+        for i in range(n_sessions)
+    ]
+    with multiprocessing.get_context('spawn').Pool(n_sessions) as pool:
+        return pool.map(apptest_worker, tasks)
+
+
+def summarize(results, wall_seconds, memory):
+    latencies = np.array([t for r in results for _, t in r['timings']]) * 1000
+    by_action = {}
+    for r in results:
+        for name, t in r['timings']:
+            by_action.setdefault(name, []).append(t * 1000)
+    cpu = [r['cpu_seconds'] for r in results]
+    return {
+        'sessions': len(results),
+        'reruns': int(latencies.size),
+        'errors': sum(len(r['errors']) for r in results),
+        'wall_seconds': round(wall_seconds, 2),
+        'throughput_rps': round(latencies.size / wall_seconds, 2) if wall_seconds else None,
+        'latency_ms': {
+            f'p{p}': round(float(np.percentile(latencies, p)), 1) if latencies.size else None
+            for p in (50, 90, 95, 99)
+        },
+        'latency_ms_by_action_p95': {
+            name: round(float(np.percentile(values, 95)), 1) for name, values in sorted(by_action.items())
+        },
+        'cpu_seconds_per_session': {'mean': round(float(np.mean(cpu)), 2), 'max': round(float(np.max(cpu)), 2)},
+        'cpu_cores_busy': round(sum(cpu) / wall_seconds, 2) if wall_seconds else None,
+        'memory_mb': memory,
+        'sample_errors': [e for r in results for e in r['errors']][:5],
+    }
+
+
+def print_report(report, baseline_p50=None):
+    latency = report['latency_ms']
+    slowdown = f"  ({latency['p50'] / baseline_p50:.1f}x first-level p50)" if baseline_p50 and latency['p50'] else ''
+    print(f"Sessions: {report['sessions']}  Reruns: {report['reruns']}  Errors: {report['errors']}  "
+          f"Wall: {report['wall_seconds']}s  Throughput: {report['throughput_rps']} reruns/s")
+    print("  Rerun latency (ms): " + "  ".join(f"{k}={v}" for k, v in latency.items()) + slowdown)
+    print("  p95 by action (ms): " + "  ".join(f"{k}={v}" for k, v in report['latency_ms_by_action_p95'].items()))
+    cpu, memory = report['cpu_seconds_per_session'], report['memory_mb']
+    print(f"  CPU per session: mean {cpu['mean']}s, max {cpu['max']}s ({report['cpu_cores_busy']} cores busy)")
+    print("  Memory (MB): " + "  ".join(f"{k}={v}" for k, v in memory.items()))
+    for error in report['sample_errors']:
+        print(f"  ! {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent session load test for the dashboard")
+    parser.add_argument('--mode', choices=['pipeline', 'apptest'], default='pipeline')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8], help="concurrency levels to ramp through")
+    parser.add_argument('--actions', type=int, default=10, help="reruns per session after the initial load")
+    parser.add_argument('--rows', type=int, default=50_000, help="HPLC rows served by the stand-in sheet")
+    parser.add_argument('--think-time', type=float, default=0.5, help="max random pause between actions (s)")
+    parser.add_argument('--refresh-every', type=int, default=5, help="press Refresh Data every N actions (0 = never)")
+    parser.add_argument('--latency-ms', type=int, default=0, help="simulated Google Sheets response delay")
+    parser.add_argument('--timeout', type=float, default=120, help="AppTest per-rerun timeout (s)")
+    parser.add_argument('--json', help="write the reports to this path as JSON")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    hpos_csv, hplc_csv = build_sheets(args.rows)
+    reports = []
+    with SheetsStub(hpos_csv, hplc_csv, args.latency_ms) as stub:
+        # Read via load_config(), by this process and by AppTest session processes
+        os.environ['CHANDANA_HPOS_URL'] = stub.base_url + HPOS_PATH
+        os.environ['CHANDANA_HPLC_URL'] = stub.base_url + HPLC_PATH
+
+        app = None
+        if args.mode == 'pipeline':
+            import streamlit.logger
+            import main as app
+            streamlit.logger.set_log_level('error')  # bare-mode warnings on every cached call
+            PipelineSession(app).rerun()  # warm the shared caches like a node that is already serving
+        baseline_rss = current_rss_mb()
+        previous_sessions, previous_delta = 0, 0.0
+
+        print(f"Mode: {args.mode}  HPLC rows: {args.rows:,}  CPUs: {os.cpu_count()}")
+        for n_sessions in args.sessions:
+            start = time.perf_counter()
+            if app is not None:
+                results, peak_rss = run_threads(app, n_sessions, args)
+                delta = peak_rss - baseline_rss
+                memory = {
+                    'process_peak': round(peak_rss, 1),
+                    'delta_over_warm_process': round(delta, 1),
+                    'per_added_session': round((delta - previous_delta) / (n_sessions - previous_sessions), 1),
+                }
+                previous_sessions, previous_delta = n_sessions, delta
+            else:
+                results = run_processes(n_sessions, args)
+                rss = [r['rss_mb'] for r in results]
+                memory = {'per_process_peak_mean': round(float(np.mean(rss)), 1), 'per_process_peak_max': round(float(np.max(rss)), 1)}
+            report = summarize(results, time.perf_counter() - start, memory)
+            print_report(report, reports[0]['latency_ms']['p50'] if reports else None)
+            reports.append(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'mode': args.mode, 'rows': args.rows, 'levels': reports}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
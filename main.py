@@ -10,6 +10,17 @@ import requests
 from io import StringIO
 import os
 
+from hierarchy import GeoHierarchy, GEO_LEVELS
+from paging import RecordIndex
+from parallel import process_datasets
+from hpos_qc import QCEngine
+from snapshots import FeedConsumer, SnapshotStore, frame_digest
+from age_bins import DEFAULT_AGE_BIN_EDGES, UNKNOWN_AGE
+from hplc_results import (
+    NOT_REPORTED, PATHOLOGY_RESULT_COLUMN, RESULT_CATEGORIES, UNRECOGNIZED,
+    disagreement_by_lab, unrecognized_results
+)
+
 # Page configuration
 st.set_page_config(
     page_title="Project Chandana Dashboard",
@@ -148,11 +159,15 @@ COLORS = {
 @st.cache_data
 def load_config():
     return {
-        'hpos_data_url': 'https://docs.google.com/spreadsheets/d/e/2PACX-1vTVZqlJ7YBLKbPSWwYTA5tAr401wUIBpp7ALPvEOKch91uxdvTevpvWs1FuQ1hQKB84RsZyAFsJYRRr/pub?gid=1058968279&single=true&output=csv',
-        'hplc_data_path': 'https://docs.google.com/spreadsheets/d/e/2PACX-1vTAHLMLCH4GO0WGXgUXO7hz3Lvc66MIgMffh3JnqcO3QSGX2Pk_YmbCRuD2welz7-aDhINSixl9g-nN/pub?gid=43184154&single=true&output=csv',
+        # Environment overrides let the load-test harness point at a local stand-in
+        'hpos_data_url': os.environ.get('CHANDANA_HPOS_URL', 'https://docs.google.com/spreadsheets/d/e/2PACX-1vTVZqlJ7YBLKbPSWwYTA5tAr401wUIBpp7ALPvEOKch91uxdvTevpvWs1FuQ1hQKB84RsZyAFsJYRRr/pub?gid=1058968279&single=true&output=csv'),
+        'hplc_data_path': os.environ.get('CHANDANA_HPLC_URL', 'https://docs.google.com/spreadsheets/d/e/2PACX-1vTAHLMLCH4GO0WGXgUXO7hz3Lvc66MIgMffh3JnqcO3QSGX2Pk_YmbCRuD2welz7-aDhINSixl9g-nN/pub?gid=43184154&single=true&output=csv'),
         'hpos_threshold_low': 0.38,
         'hpos_threshold_high': 0.42,
         'target_hplc_tests': 3000,  # Increased target
+        'age_bin_edges': DEFAULT_AGE_BIN_EDGES,  # 5-year bins, last bin open-ended
+        'parallel_workers': os.cpu_count() or 1,
+        'parallel_min_rows': 250000,  # Below this, pool startup costs more than it saves
         'theme': {
             'primary_color': '#667eea',
             'background_color': '#ffffff',
@@ -243,35 +258,114 @@ def load_data(hpos_url, hplc_source):
         hplc_data = create_sample_hplc_data()
         st.warning("🔄 Using sample HPLC data due to loading error")
     
-    return hpos_data, hplc_data
+    # Record the data version so downstream views can diff and update incrementally;
+    # the versions also key caches whose frames are too large for Streamlit to hash fully
+    data_versions = {'hpos': frame_digest(hpos_data) if hpos_data is not None else None, 'hplc': None}
+    if hplc_data is not None:
+        data_versions['hplc'] = get_snapshot_store().commit(hplc_data).version
+    
+    return hpos_data, hplc_data, data_versions
 
-def process_age_data(df):
-    """Process age data and create age groups"""
-    if 'Age' not in df.columns:
-        return df
-    df['age_in_years'] = df['Age'].str.replace(r'\s*[yY][rR][sS]\s*', '', regex=True)
-    df['age_in_years'] = pd.to_numeric(df['age_in_years'], errors='coerce')
-    df['age_in_years'] = df['age_in_years'].fillna(0).astype(int)
-    
-    min_age = df['age_in_years'].min()
-    max_age = df['age_in_years'].max()
-    bins = range(min_age // 5 * 5, (max_age // 5 + 2) * 5, 5)
-    labels = [f"{i}-{i+4}" for i in bins[:-1]]
-    
-    df['age_group'] = pd.cut(df['age_in_years'], bins=bins, labels=labels, right=False)
-    return df
+@st.cache_resource
+def get_snapshot_store():
+    """Version history of the HPLC sheet shared across sessions"""
+    return SnapshotStore()
 
-def process_gender_data(df):
-    """Process and standardize gender data"""
-    if 'Gender' not in df.columns:
-        return df
-    df['Gender'] = df['Gender'].astype(str).str.strip().str.upper()
-    gender_map = {
-        'M': 'Male', 'F': 'Female', 'MALE': 'Male', 'FEMALE': 'Female',
-        'NA': 'Unknown', '': 'Unknown', 'NAN': 'Unknown'
-    }
-    df['Gender_standardized'] = df['Gender'].map(gender_map).fillna('Unknown')
-    return df
+@st.cache_resource
+def get_geo_hierarchy_feed():
+    """Geographic rollup kept current by consuming the snapshot change feed"""
+    return FeedConsumer(GeoHierarchy.from_frame, GeoHierarchy.apply_changes)
+
+@st.cache_resource(ttl=3600, max_entries=4)
+def build_record_index(_df, key_columns, text_columns, data_version, _lookup=None):
+    """Build the search/sort index for a report table once per data version
+    
+    The frames are excluded from the cache key (Streamlit only hashes a sample
+    of large frames, so edits could be missed); ``data_version`` identifies them.
+    """
+    return RecordIndex(_df, key_columns, text_columns, lookup=_lookup)
+
+def is_id_column(column):
+    """True for identifier columns such as 'deviceId', 'Sample ID' or 'sample_id', not 'Valid' or 'Provider'"""
+    words = re.split(r'[\s_.\-]+', re.sub(r'([a-z0-9])([A-Z])', r'\1 \2', str(column)).strip())
+    return words[-1].lower() == 'id'
+
+def reset_page(page_key):
+    """Send a paged table back to its first page when its search, filters or sort change"""
+    st.session_state[page_key] = 1
+
+def render_paged_table(record_index, key_prefix, filter_columns=()):
+    """Render a searchable, sortable table that only sends the visible page to the browser"""
+    columns = list(record_index.df.columns)
+    page_key = f"{key_prefix}_page"
+    control_cols = st.columns([3, 2, 2, 1, 1, 1])
+    
+    with control_cols[0]:
+        search = st.text_input("🔍 Search", key=f"{key_prefix}_search", placeholder="Sickle Id, SL No., or 3+ letters of a name or village",
+                               on_change=reset_page, args=(page_key,))
+    filters = {}
+    with control_cols[1]:
+        for col in filter_columns:
+            if col in columns:
+                choice = st.selectbox(col, ["All"] + record_index.filter_options(col), key=f"{key_prefix}_filter_{col}",
+                                      on_change=reset_page, args=(page_key,))
+                filters[col] = None if choice == "All" else choice
+    with control_cols[2]:
+        sort_choice = st.selectbox("Sort by", ["(original order)"] + columns, key=f"{key_prefix}_sort",
+                                   on_change=reset_page, args=(page_key,))
+    with control_cols[3]:
+        ascending = st.radio("Order", ["Asc", "Desc"], key=f"{key_prefix}_order", on_change=reset_page, args=(page_key,)) == "Asc"
+    with control_cols[4]:
+        page_size = st.selectbox("Rows", [25, 50, 100, 200], index=1, key=f"{key_prefix}_page_size",
+                                 on_change=reset_page, args=(page_key,))
+    
+    search = search.strip() or None
+    sort_by = None if sort_choice == "(original order)" else sort_choice
+    page = int(st.session_state.get(page_key, 1))
+    page_df, total = record_index.query(search, filters, sort_by, ascending, page=page, page_size=page_size)
+    n_pages = max((total - 1) // page_size + 1, 1)
+    if page > n_pages:
+        # Clamp before the page input is drawn so it shows the page actually displayed
+        page = st.session_state[page_key] = n_pages
+        page_df, total = record_index.query(search, filters, sort_by, ascending, page=page, page_size=page_size)
+    with control_cols[5]:
+        st.number_input("Page", min_value=1, max_value=n_pages, step=1, key=page_key)
+    
+    st.dataframe(page_df, use_container_width=True, height=400)
+    first_row = (page - 1) * page_size + 1 if total else 0
+    st.caption(f"Showing {first_row:,}–{(page - 1) * page_size + len(page_df):,} of {total:,} matching records · Page {page} of {n_pages}")
+
+@st.cache_data(ttl=3600, max_entries=4)
+def prepare_hplc_data(_hplc_data, _hpos_data, data_versions, thresholds, age_bin_edges, workers, min_rows):
+    """Normalised HPLC table and dashboard counts, computed once per data version
+    
+    Normalisation runs partitioned across a process pool for large datasets.
+    The frames are identified by ``data_versions`` instead of being hashed.
+    """
+    n_rows = len(_hplc_data) + (len(_hpos_data) if _hpos_data is not None else 0)
+    normalized, aggregates = process_datasets(
+        _hplc_data,
+        _hpos_data,
+        thresholds=thresholds,
+        workers=workers if n_rows >= min_rows else 1,
+        age_bin_edges=age_bin_edges
+    )
+    
+    expected_columns = ['SL No.', 'Sickle Id', 'Age', 'Gender', 'District', 'Pathology stated HPLC RESULT', 'Lab_HPOS_Test']
+    available_columns = [col for col in expected_columns if col in _hplc_data.columns]
+    
+    if available_columns:
+        hplc_processed = _hplc_data[available_columns].copy()
+    else:
+        hplc_processed = _hplc_data.copy()
+    for col in normalized.columns:
+        hplc_processed[col] = normalized[col]
+    return hplc_processed, aggregates
+
+@st.cache_resource
+def get_qc_engine():
+    """Streaming QC state shared across reruns; each rerun only feeds it new HPOS rows"""
+    return QCEngine()
 
 def get_weekly_delta(df, date_column=None):
     """Calculate weekly delta for metrics"""
@@ -313,6 +407,7 @@ def main():
         
         if st.button("🔄 Refresh Data", key="refresh_main"):
             st.cache_data.clear()
+            build_record_index.clear()
             st.rerun()
         
         st.markdown("---")
@@ -320,23 +415,22 @@ def main():
     
     # Load data
     with st.spinner("🚀 Loading data from cloud sources..."):
-        hpos_data, hplc_data = load_data(config['hpos_data_url'], config['hplc_data_path'])
+        hpos_data, hplc_data, data_versions = load_data(config['hpos_data_url'], config['hplc_data_path'])
     
     if hplc_data is None:
         st.error("Critical error: Could not load any data.")
         return
     
-    # Process HPLC data with better error handling
-    expected_columns = ['SL No.', 'Sickle Id', 'Age', 'Gender', 'District', 'Pathology stated HPLC RESULT', 'Lab_HPOS_Test']
-    available_columns = [col for col in expected_columns if col in hplc_data.columns]
-    
-    if available_columns:
-        hplc_processed = hplc_data[available_columns].copy()
-    else:
-        hplc_processed = hplc_data.copy()
-    
-    hplc_processed = process_age_data(hplc_processed)
-    hplc_processed = process_gender_data(hplc_processed)
+    # Normalise and aggregate once per data version (partitioned across processes for large sheets)
+    hplc_processed, aggregates = prepare_hplc_data(
+        hplc_data,
+        hpos_data,
+        (data_versions['hplc'], data_versions['hpos']),
+        (config['hpos_threshold_low'], config['hpos_threshold_high']),
+        config['age_bin_edges'],
+        config['parallel_workers'],
+        config['parallel_min_rows']
+    )
     
     # Enhanced Main Tabs
     tab1, tab2, tab3, tab4 = st.tabs(["📈 Overview", "👥 Demographics", "🔬 HPOS Analysis", "📊 Detailed Reports"])
@@ -361,7 +455,7 @@ def main():
             create_enhanced_metric_card("Progress", f"{progress_pct:.1f}%")
         
         with col4:
-            signed_tests = hplc_processed['Pathology stated HPLC RESULT'].notna().sum() if 'Pathology stated HPLC RESULT' in hplc_processed.columns else total_hplc
+            signed_tests = (hplc_processed['hplc_result_class'] != NOT_REPORTED).sum() if 'hplc_result_class' in hplc_processed.columns else total_hplc
             create_enhanced_metric_card("Signed Tests", f"{signed_tests:,}")
         
         # Enhanced progress bar
@@ -381,7 +475,8 @@ def main():
         
         with chart_col1:
             if 'age_group' in hplc_processed.columns:
-                age_counts = hplc_processed['age_group'].value_counts().sort_index()
+                age_counts = aggregates['age_group'].drop(UNKNOWN_AGE)
+                unknown_ages = aggregates['age_group'][UNKNOWN_AGE]
                 fig_age = px.bar(
                     x=age_counts.index, 
                     y=age_counts.values,
@@ -400,10 +495,12 @@ def main():
                     yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)')
                 )
                 st.plotly_chart(fig_age, use_container_width=True)
+                if unknown_ages:
+                    st.caption(f"{unknown_ages:,} records have a missing or unparseable age and are excluded from this chart")
         
         with chart_col2:
             if 'Gender_standardized' in hplc_processed.columns:
-                gender_counts = hplc_processed['Gender_standardized'].value_counts()
+                gender_counts = aggregates['gender']
                 fig_gender = px.pie(
                     values=gender_counts.values,
                     names=gender_counts.index,
@@ -419,6 +516,49 @@ def main():
                 )
                 fig_gender.update_traces(textposition='inside', textinfo='percent+label')
                 st.plotly_chart(fig_gender, use_container_width=True)
+        
+        # HPLC result mix from the classified results
+        if 'hplc_result_class' in hplc_processed.columns:
+            st.markdown("<br>", unsafe_allow_html=True)
+            st.markdown("### 🧪 HPLC Result Mix")
+            
+            mix_col1, mix_col2 = st.columns([3, 2], gap="large")
+            
+            with mix_col1:
+                mix_counts = aggregates['result_mix'].drop(NOT_REPORTED)
+                fig_mix = px.bar(
+                    x=mix_counts.index,
+                    y=mix_counts.values,
+                    title="🧬 Pathology Stated HPLC Results",
+                    labels={'x': 'Result', 'y': 'Number of Patients'},
+                    color=mix_counts.index,
+                    color_discrete_sequence=COLORS['gradient'] + [COLORS['error'], COLORS['warning']],
+                    category_orders={'x': RESULT_CATEGORIES}
+                )
+                fig_mix.update_layout(
+                    height=450,
+                    title_font_size=16,
+                    title_x=0.5,
+                    showlegend=False,
+                    plot_bgcolor='rgba(0,0,0,0)',
+                    paper_bgcolor='rgba(0,0,0,0)',
+                    xaxis=dict(showgrid=False),
+                    yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)')
+                )
+                st.plotly_chart(fig_mix, use_container_width=True)
+                
+                if mix_counts.get(UNRECOGNIZED, 0):
+                    with st.expander(f"❓ {mix_counts[UNRECOGNIZED]:,} results did not match any known pattern"):
+                        unmatched_df = unrecognized_results(hplc_data[PATHOLOGY_RESULT_COLUMN], hplc_processed['hplc_result_class'])
+                        st.dataframe(unmatched_df, use_container_width=True, hide_index=True)
+            
+            with mix_col2:
+                st.markdown("**🔍 Pathologist vs Technician Agreement**")
+                disagreement_df = disagreement_by_lab(hplc_processed, source=hplc_data)
+                if disagreement_df.empty:
+                    st.info("No samples with both pathologist and technician results yet")
+                else:
+                    st.dataframe(disagreement_df, use_container_width=True, hide_index=True)
     
     with tab2:
         st.markdown("### 👥 Comprehensive Demographics Analysis")
@@ -452,7 +592,7 @@ def main():
         
         with demo_col2:
             if 'age_group' in hplc_processed.columns:
-                age_counts = hplc_processed['age_group'].value_counts().sort_index()
+                age_counts = aggregates['age_group']
                 st.markdown("**📋 Age Group Summary**")
                 age_df = age_counts.to_frame("Count").reset_index()
                 age_df.columns = ["Age Group", "Count"]
@@ -465,10 +605,7 @@ def main():
         st.markdown("#### 🏙️ Geographic Distribution Analysis")
         
         if 'District' in hplc_processed.columns:
-            hplc_processed['District'] = hplc_processed['District'].astype(str).str.strip().str.title()
-            hplc_processed['District'] = hplc_processed['District'].replace('Nan', 'Unknown')
-            
-            district_counts = hplc_processed['District'].value_counts().head(15)  # Top 15 districts
+            district_counts = aggregates['district'].head(15)  # Top 15 districts
             
             # Enhanced horizontal bar chart with gradient colors
             fig_district = px.bar(
@@ -500,6 +637,58 @@ def main():
             district_df.columns = ["District", "Number of Tests"]
             district_df["Percentage"] = (district_df["Number of Tests"] / district_df["Number of Tests"].sum() * 100).round(1)
             st.dataframe(district_df, use_container_width=True, hide_index=True)
+        
+        # Hierarchical drill-down backed by the precomputed rollup
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.markdown("#### 🧭 Geographic Drill-down")
+        
+        geo_hierarchy = get_geo_hierarchy_feed().sync(get_snapshot_store()) or GeoHierarchy.from_frame(hplc_data)
+        
+        if not geo_hierarchy.children_of[()]:
+            st.info("No location columns available for drill-down")
+        else:
+            # Each level lists only the children of the current selection
+            geo_path = ()
+            drill_cols = st.columns(len(GEO_LEVELS) - 1)
+            for level, drill_col in zip(GEO_LEVELS[:-1], drill_cols):
+                level_options = geo_hierarchy.children(geo_path)['Name'].tolist()
+                if not level_options:
+                    break
+                with drill_col:
+                    choice = st.selectbox(level, ["All"] + level_options, key=f"geo_drill_{level}")
+                if choice == "All":
+                    break
+                geo_path = geo_path + (choice,)
+            
+            # The chart is rooted at the selection and only carries two levels below it
+            geo_df = geo_hierarchy.to_sunburst_frame(root=geo_path, max_depth=2)
+            geo_view = st.radio("Hierarchy View", ["Sunburst", "Treemap"], horizontal=True, key="geo_view")
+            geo_chart = px.sunburst if geo_view == "Sunburst" else px.treemap
+            fig_geo = geo_chart(
+                geo_df,
+                ids='id',
+                names='label',
+                parents='parent',
+                values='count',
+                branchvalues='total',
+                color='hpos_positivity',
+                color_continuous_scale='RdYlGn_r',
+                hover_data={'level': True, 'hpos_positivity': ':.1f'},
+                title=f"🌐 {' / '.join(geo_path) or 'All Districts'} Coverage"
+            )
+            fig_geo.update_layout(
+                height=650,
+                title_font_size=16,
+                title_x=0.5,
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                coloraxis_colorbar=dict(title="HPOS +ve %")
+            )
+            st.plotly_chart(fig_geo, use_container_width=True)
+            
+            child_level = GEO_LEVELS[min(len(geo_path), len(GEO_LEVELS) - 1)]
+            st.markdown(f"**📍 {' / '.join(geo_path) or 'All Districts'} — {child_level} Breakdown**")
+            st.dataframe(geo_hierarchy.children(geo_path), use_container_width=True, hide_index=True)
     
     with tab3:
         st.markdown("### 🔬 HPOS Analysis Dashboard")
@@ -581,16 +770,15 @@ def main():
                 col1, col2, col3, col4 = st.columns(4)
                 
                 with col1:
-                    below_threshold = (valid_ratios < config['hpos_threshold_low']).sum()
+                    below_threshold = aggregates['hpos']['below']
                     create_enhanced_metric_card("Below Threshold", f"{below_threshold:,}")
                 
                 with col2:
-                    within_range = ((valid_ratios >= config['hpos_threshold_low']) & 
-                                   (valid_ratios <= config['hpos_threshold_high'])).sum()
+                    within_range = aggregates['hpos']['within']
                     create_enhanced_metric_card("Normal Range", f"{within_range:,}")
                 
                 with col3:
-                    above_threshold = (valid_ratios > config['hpos_threshold_high']).sum()
+                    above_threshold = aggregates['hpos']['above']
                     create_enhanced_metric_card("Above Threshold", f"{above_threshold:,}")
                 
                 with col4:
@@ -605,6 +793,68 @@ def main():
                 if invalid_samples > 0:
                     st.info(f"📈 Data Quality Summary: {valid_samples:,} valid samples out of {total_samples:,} total samples. {invalid_samples:,} samples had invalid ratio values.")
                 
+                # Per-device streaming control charts
+                st.markdown("<br>", unsafe_allow_html=True)
+                st.markdown("#### 🛰️ Per-Device Quality Control")
+                
+                qc_engine = get_qc_engine()
+                qc_engine.update(hpos_data, data_versions['hpos'])
+                qc_summary = qc_engine.summary()
+                
+                st.dataframe(qc_summary, use_container_width=True, hide_index=True)
+                
+                qc_col1, qc_col2 = st.columns([3, 2], gap="large")
+                
+                with qc_col1:
+                    device_options = [f"{row.Device} · {row.Lab}" for row in qc_summary.itertuples()]
+                    device_choice = st.selectbox("Control Chart Device", device_options, key="qc_device")
+                    device, lab = qc_summary.iloc[device_options.index(device_choice)][['Device', 'Lab']]
+                    qc_history, qc_mean, qc_sd = qc_engine.chart_frame(device, lab)
+                    
+                    fig_qc = go.Figure()
+                    fig_qc.add_trace(go.Scatter(
+                        x=qc_history['Sample'],
+                        y=qc_history['Ratio'],
+                        mode='markers+lines',
+                        name='Ratio',
+                        line=dict(color=COLORS['primary'], width=1),
+                        marker=dict(size=5)
+                    ))
+                    fig_qc.add_trace(go.Scatter(
+                        x=qc_history['Sample'],
+                        y=qc_history['EWMA'],
+                        mode='lines',
+                        name='EWMA',
+                        line=dict(color=COLORS['secondary'], width=3)
+                    ))
+                    if qc_mean is not None:
+                        fig_qc.add_hline(y=qc_mean, line_color=COLORS['success'], line_width=2)
+                        for n_sd, color in ((2, COLORS['warning']), (3, COLORS['error'])):
+                            fig_qc.add_hline(y=qc_mean + n_sd * qc_sd, line_dash="dot", line_color=color)
+                            fig_qc.add_hline(y=qc_mean - n_sd * qc_sd, line_dash="dot", line_color=color)
+                    fig_qc.update_layout(
+                        title=f"📉 Control Chart - {device_choice}",
+                        title_font_size=16,
+                        title_x=0.5,
+                        xaxis_title="Sample Index",
+                        yaxis_title="Absorbance Ratio",
+                        height=450,
+                        plot_bgcolor='rgba(0,0,0,0)',
+                        paper_bgcolor='rgba(0,0,0,0)',
+                        xaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+                        yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)')
+                    )
+                    st.plotly_chart(fig_qc, use_container_width=True)
+                
+                with qc_col2:
+                    st.markdown("**🚨 QC Alerts (Westgard / EWMA / CUSUM)**")
+                    show_warnings = st.checkbox("Include 1-2s warnings", key="qc_warnings")
+                    qc_alerts = qc_engine.alert_frame(include_warnings=show_warnings)
+                    if qc_alerts.empty:
+                        st.success("No QC rule violations")
+                    else:
+                        st.dataframe(qc_alerts.head(100), use_container_width=True, hide_index=True, height=400)
+                
         elif hpos_data is None:
             st.warning("🔗 HPOS data could not be loaded from Google Sheets. Please verify the connection.")
         else:
@@ -614,7 +864,7 @@ def main():
         st.markdown("### 📊 Comprehensive Data Reports")
         
         # Enhanced data tables with better formatting
-        st.markdown("#### 🔬 HPLC Data Sample")
+        st.markdown("#### 🔬 HPLC Records")
         
         # Add summary statistics before showing the table
         summary_col1, summary_col2, summary_col3 = st.columns(3)
@@ -630,16 +880,19 @@ def main():
                 unique_districts = hplc_processed['District'].nunique()
                 st.metric("Districts Covered", unique_districts)
         
-        # Enhanced data table with better styling
-        st.dataframe(
-            hplc_processed.head(50), 
-            use_container_width=True,
-            height=400
+        # Indexed table: search, sort and paging only materialize the visible page
+        hplc_index = build_record_index(
+            hplc_processed,
+            ('Sickle Id', 'SL No.'),
+            ('Name', 'Village'),
+            ('hplc', data_versions['hplc']),
+            _lookup=hplc_data
         )
+        render_paged_table(hplc_index, "hplc_table", filter_columns=('District',))
         
         if hpos_data is not None:
             st.markdown("<br>", unsafe_allow_html=True)
-            st.markdown("#### 🧪 HPOS Data Sample")
+            st.markdown("#### 🧪 HPOS Records")
             
             # HPOS summary statistics
             hpos_col1, hpos_col2, hpos_col3 = st.columns(3)
@@ -657,11 +910,10 @@ def main():
             with hpos_col3:
                 st.metric("Data Columns", len(hpos_data.columns))
             
-            st.dataframe(
-                hpos_data.head(50), 
-                use_container_width=True,
-                height=400
-            )
+            hpos_key_columns = tuple(col for col in hpos_data.columns if is_id_column(col) or col == 'SL No.')
+            hpos_text_columns = tuple(col for col in hpos_data.columns if col.lower() in ('name', 'village'))
+            hpos_index = build_record_index(hpos_data, hpos_key_columns, hpos_text_columns, ('hpos', data_versions['hpos']))
+            render_paged_table(hpos_index, "hpos_table")
         else:
             st.info("📋 HPOS data not available - check Google Sheets connection")
         
@@ -717,6 +969,57 @@ def main():
                 - Verify published URL permissions
                 """)
         
+        # Change feed between data versions
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.markdown("#### 🕒 What Changed")
+        
+        snapshot_store = get_snapshot_store()
+        change_window = st.selectbox(
+            "Compare current data with",
+            ["Yesterday", "Last 7 days", "Previous version"],
+            key="change_window"
+        )
+        compare_cutoff = None
+        if change_window == "Previous version":
+            feed = snapshot_store.feed
+            change_set = feed[-1] if feed else None
+        else:
+            compare_cutoff = datetime.now() - timedelta(days=1 if change_window == "Yesterday" else 7)
+            change_set = snapshot_store.diff_since(compare_cutoff)
+        
+        if change_set is None:
+            st.info("Only one data version has been captured so far - changes appear after the next refresh")
+        else:
+            change_summary = change_set.summary()
+            base_captured = change_summary['From Captured'].strftime('%Y-%m-%d %H:%M')
+            if compare_cutoff is not None and change_summary['From Captured'] > compare_cutoff:
+                st.warning(f"No kept version is that old - comparing with the oldest kept version, v{change_summary['From Version']} captured {base_captured}")
+            else:
+                st.caption(f"Comparing with v{change_summary['From Version']} captured {base_captured}")
+            change_col1, change_col2, change_col3, change_col4 = st.columns(4)
+            with change_col1:
+                st.metric("Versions", f"v{change_summary['From Version']} → v{change_summary['To Version']}")
+            with change_col2:
+                st.metric("Added Records", f"{change_summary['Added']:,}")
+            with change_col3:
+                st.metric("Removed Records", f"{change_summary['Removed']:,}")
+            with change_col4:
+                modified_rows = change_summary['Modified Rows']
+                st.metric("Modified Records", f"{modified_rows:,}" if modified_rows is not None else "n/a")
+            
+            if modified_rows is None:
+                st.caption("The sheet's columns changed since this version, so only added and removed records can be compared")
+            elif change_set.is_empty:
+                st.success("No record changes between these versions")
+            elif len(change_set.modified_cells):
+                st.markdown("**✏️ Modified Cells**")
+                st.dataframe(change_set.modified_cells.head(500), use_container_width=True, hide_index=True, height=300)
+            elif len(change_set.modified):
+                st.caption("Cell-level detail is only kept for the two most recent versions")
+        
+        with st.expander("📚 Version History"):
+            st.dataframe(snapshot_store.versions(), use_container_width=True, hide_index=True)
+        
         # Data quality report
         st.markdown("<br>", unsafe_allow_html=True)
         st.markdown("#### 📈 Data Quality Report")
@@ -0,0 +1,162 @@
+"""Indexed, server-side paging for the Detailed Reports tables"""
+import numpy as np
+import pandas as pd
+
+TRIGRAM_SIZE = 3
+
+
+def normalize_text(series):
+    """Uppercase/strip free text so keys and search terms compare consistently"""
+    return series.astype('string').str.strip().str.upper().fillna('')
+
+
+def _trigrams(value):
+    return {value[i:i + TRIGRAM_SIZE] for i in range(len(value) - TRIGRAM_SIZE + 1)}
+
+
+class SortedKeyIndex:
+    """Sorted copy of one key column for O(log n) exact and prefix lookups"""
+
+    def __init__(self, series):
+        if pd.api.types.is_float_dtype(series) and (series.dropna() % 1 == 0).all():
+            series = series.astype('Int64')  # SL No. read as float because of blank rows
+        keys = normalize_text(series).to_numpy(dtype=object)
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order].astype(str)
+
+    def prefix(self, term):
+        left = np.searchsorted(self.keys, term, side='left')
+        right = np.searchsorted(self.keys, term + '\uffff', side='left')
+        return self.order[left:right]
+
+    def exact(self, term):
+        left = np.searchsorted(self.keys, term, side='left')
+        right = np.searchsorted(self.keys, term, side='right')
+        return self.order[left:right]
+
+
+class TrigramIndex:
+    """Substring search over a text column via trigrams of its distinct values"""
+
+    def __init__(self, series):
+        codes, uniques = pd.factorize(normalize_text(series), sort=False)
+        self.uniques = np.asarray(uniques, dtype=object)
+        self.postings = {}
+        for code, value in enumerate(self.uniques):
+            for gram in _trigrams(value):
+                self.postings.setdefault(gram, []).append(code)
+        self.postings = {gram: np.array(found) for gram, found in self.postings.items()}
+
+        # Rows grouped by value code so matched values map back to rows without a scan
+        self.row_order = np.argsort(codes, kind='stable')
+        self.row_starts = np.searchsorted(codes[self.row_order], np.arange(len(self.uniques) + 1))
+
+    def search(self, term):
+        """Rows whose value contains ``term``; terms shorter than a trigram match nothing here"""
+        if len(term) < TRIGRAM_SIZE:
+            return np.empty(0, dtype=np.intp)  # would scan every value and match nearly every row
+        candidates = None
+        for gram in _trigrams(term):
+            found = self.postings.get(gram)
+            if found is None:
+                return np.empty(0, dtype=np.intp)
+            candidates = found if candidates is None else np.intersect1d(candidates, found, assume_unique=True)
+        matched = [code for code in candidates if term in self.uniques[code]]
+        if not matched:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate([self.row_order[self.row_starts[c]:self.row_starts[c + 1]] for c in matched])
+
+
+class RecordIndex:
+    """Search, filter, sort and page a frame while only materializing the visible rows
+
+    ``lookup`` is an optional frame aligned row-for-row with ``df`` that holds
+    searchable columns not shown in the table (e.g. Name and Village).
+    """
+
+    def __init__(self, df, key_columns=(), text_columns=(), lookup=None):
+        self.df = df
+        lookup = df if lookup is None else lookup
+        self.key_indexes = {col: SortedKeyIndex(lookup[col]) for col in key_columns if col in lookup.columns}
+        self.text_indexes = {col: TrigramIndex(lookup[col]) for col in text_columns if col in lookup.columns}
+        self._sort_orders = {}
+        self._sort_ranks = {}
+        self._filter_codes = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def sort_order(self, column):
+        """Row positions in ascending order of ``column``, computed once per column"""
+        if column not in self._sort_orders:
+            values = self.df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype) and values.cat.ordered:
+                values = values.cat.codes  # e.g. age groups sort in bin order
+            numeric = pd.to_numeric(values, errors='coerce')
+            if numeric.notna().sum() >= values.notna().sum():
+                values = numeric
+            else:
+                values = normalize_text(values).replace('', '\uffff')  # blanks sort last
+            order = np.argsort(values.to_numpy(), kind='stable')
+            rank = np.empty(len(order), dtype=np.intp)
+            rank[order] = np.arange(len(order))
+            self._sort_orders[column] = order
+            self._sort_ranks[column] = rank
+        return self._sort_orders[column]
+
+    def filter_options(self, column):
+        return self._factorized(column)[1]
+
+    def _factorized(self, column):
+        if column not in self._filter_codes:
+            codes, uniques = pd.factorize(self.df[column].astype('string').fillna('Unknown'), sort=True)
+            self._filter_codes[column] = (codes, list(uniques))
+        return self._filter_codes[column]
+
+    def search(self, term):
+        """Row positions matching ``term`` by key prefix, or by text substring for 3+ characters"""
+        term = str(term).strip().upper()
+        hits = [index.prefix(term) for index in self.key_indexes.values()]
+        hits += [index.search(term) for index in self.text_indexes.values()]
+        hits = [h for h in hits if len(h)]
+        if not hits:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(np.concatenate(hits))
+
+    def lookup(self, column, key):
+        """Exact match on an indexed key column, e.g. a single Sickle Id"""
+        positions = self.key_indexes[column].exact(str(key).strip().upper())
+        return self.df.iloc[np.sort(positions)]
+
+    def query(self, search=None, filters=None, sort_by=None, ascending=True, page=1, page_size=50):
+        """Return (page_frame, total_matches) for the requested view"""
+        positions = self.search(search) if search else None
+
+        for column, value in (filters or {}).items():
+            if value is None:
+                continue
+            codes, uniques = self._factorized(column)
+            if value not in uniques:
+                return self.df.iloc[0:0], 0
+            wanted = uniques.index(value)
+            if positions is None:
+                positions = np.flatnonzero(codes == wanted)
+            else:
+                positions = positions[codes[positions] == wanted]
+
+        if sort_by is not None:
+            order = self.sort_order(sort_by)
+            if positions is None:
+                positions = order
+            else:
+                rank = self._sort_ranks[sort_by]
+                positions = positions[np.argsort(rank[positions], kind='stable')]
+            if not ascending:
+                positions = positions[::-1]
+
+        total = len(self.df) if positions is None else len(positions)
+        start = max(page - 1, 0) * page_size
+        stop = min(start + page_size, total)
+        if positions is None:
+            return self.df.iloc[start:stop], total
+        return self.df.iloc[positions[start:stop]], total
@@ -0,0 +1,318 @@
+"""Partitioned normalise+aggregate over a process pool with shared-memory buffers
+
+The parent copies the raw HPLC columns into shared memory once, as Arrow
+buffers for text and float64 arrays for numbers. Each worker attaches to
+those buffers, takes its own row range, and does the per-row work there:
+factorizing, normalising the distinct values, and binning ages. It returns
+the normalised columns for its rows plus partial label counts, which the
+parent concatenates and sums.
+"""
+import atexit
+import contextlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pandas.api.types import union_categoricals
+
+from age_bins import DEFAULT_AGE_BIN_EDGES, get_age_binner, parse_ages
+from demographics import normalize_gender
+from hierarchy import normalize_location
+from hplc_results import (
+    PATHOLOGY_CLASS_COLUMN, PATHOLOGY_RESULT_COLUMN, RESULT_CATEGORIES,
+    TECHNICIAN_CLASS_COLUMN, TECHNICIAN_RESULT_COLUMN, classify_results
+)
+
+
+def _normalize_distinct(normalize):
+    """Normalise each distinct value once and broadcast the labels back as a Categorical"""
+    def run(values, age_bin_edges):
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        # Missing values (code -1) take the slot appended at the end
+        labels = normalize(pd.Series(np.append(np.asarray(uniques, dtype=object), np.nan), dtype=object))
+        label_codes, label_names = pd.factorize(labels)
+        return pd.Categorical.from_codes(label_codes[codes], categories=label_names)
+    return run
+
+
+def _bin_ages(values, age_bin_edges):
+    years = parse_ages(values)
+    return {'age_in_years': years.to_numpy(), 'age_group': get_age_binner(tuple(age_bin_edges)).assign(years).array}
+
+
+# Source column -> (output column, function turning a partition of raw values into it)
+HPLC_COLUMNS = {
+    'Gender': ('Gender_standardized', _normalize_distinct(normalize_gender)),
+    'District': ('District', _normalize_distinct(normalize_location)),
+    'Age': (None, _bin_ages),  # produces age_in_years and age_group
+    PATHOLOGY_RESULT_COLUMN: (PATHOLOGY_CLASS_COLUMN, lambda values, edges: classify_results(values).array),
+    TECHNICIAN_RESULT_COLUMN: (TECHNICIAN_CLASS_COLUMN, lambda values, edges: classify_results(values).array),
+}
+# Normalised column -> aggregate it is counted into
+AGGREGATE_NAMES = {
+    'Gender_standardized': 'gender',
+    'District': 'district',
+    PATHOLOGY_CLASS_COLUMN: 'result_mix',
+    'age_group': 'age_group',
+}
+HPOS_BUCKETS = ['below', 'within', 'above', 'invalid']
+
+# Forking the multi-threaded Streamlit server is unsafe; start workers from a clean process
+MP_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    """Process pool kept alive between calls so reloads don't pay worker start-up again"""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            context = multiprocessing.get_context(MP_START_METHOD)
+            if MP_START_METHOD == 'forkserver':
+                context.set_forkserver_preload(['parallel'])
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        return pool
+
+
+@atexit.register
+def _shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _to_shared(array):
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm, ('numeric', shm.name, array.shape, array.dtype.str)
+
+
+def _text_to_shared(chunks):
+    """Write Arrow string chunks straight into one shared-memory segment as a single array
+
+    Offsets are rebased chunk by chunk while copying (narrowed to 32 bits
+    when the text fits), so the only pass over the data is the copy itself.
+    """
+    n_rows = sum(len(chunk) for chunk in chunks)
+    null_count = sum(chunk.null_count for chunk in chunks)
+    spans = [_chunk_offsets(chunk) for chunk in chunks]
+    n_bytes = sum(int(offsets[-1] - offsets[0]) for offsets in spans)
+    offset_type, type_name = (np.int32, 'string') if n_bytes < 2**31 else (np.int64, 'large_string')
+
+    validity_size = (n_rows + 7) // 8 if null_count else 0
+    offsets_size = (n_rows + 1) * np.dtype(offset_type).itemsize
+    shm = shared_memory.SharedMemory(create=True, size=max(validity_size + offsets_size + n_bytes, 1))
+    if null_count:
+        valid = np.concatenate([chunk.is_valid().to_numpy(zero_copy_only=False) for chunk in chunks])
+        shm.buf[:validity_size] = np.packbits(valid, bitorder='little').tobytes()
+    offsets_out = np.ndarray(n_rows + 1, dtype=offset_type, buffer=shm.buf, offset=validity_size)
+    offsets_out[0] = 0
+    data_start = validity_size + offsets_size
+    row, position = 0, 0
+    for chunk, offsets in zip(chunks, spans):
+        np.subtract(offsets[1:], offsets[0] - position, out=offsets_out[row + 1:row + 1 + len(chunk)], casting='unsafe')
+        size = int(offsets[-1] - offsets[0])
+        if size:
+            data = chunk.buffers()[2]
+            shm.buf[data_start + position:data_start + position + size] = memoryview(data).cast('B')[int(offsets[0]):int(offsets[-1])]
+        row += len(chunk)
+        position += size
+    layout = [
+        (0, validity_size) if null_count else None,
+        (validity_size, offsets_size),
+        (data_start, n_bytes),
+    ]
+    return shm, ('text', shm.name, type_name, n_rows, null_count, 0, layout)
+
+
+def _chunk_offsets(chunk):
+    width = np.int64 if pa.types.is_large_string(chunk.type) else np.int32
+    return np.frombuffer(chunk.buffers()[1], dtype=width)[chunk.offset:chunk.offset + len(chunk) + 1]
+
+
+def _column_to_shared(series, order=None):
+    """Numeric columns go over as float64, everything else as Arrow strings"""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        return _to_shared(values if order is None else values[order])
+    array = pa.chunked_array(pa.array(series.astype('str'), from_pandas=True))
+    if order is not None:
+        array = array.take(order)
+    return _text_to_shared(array.chunks)
+
+
+def _attach(spec, start, stop):
+    """Attach to a shared column and return (handle, rows [start, stop) as a pandas object)"""
+    if spec[0] == 'numeric':
+        _, name, shape, dtype = spec
+        shm = shared_memory.SharedMemory(name=name)
+        values = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        return shm, pd.Series(values[start:stop])
+    _, name, type_name, length, null_count, offset, layout = spec
+    shm = shared_memory.SharedMemory(name=name)
+    buffers = [None if part is None else pa.py_buffer(shm.buf[part[0]:part[0] + part[1]]) for part in layout]
+    array = pa.Array.from_buffers(pa.type_for_alias(type_name), length, buffers, null_count, offset)
+    return shm, pd.Series(pd.array(array.slice(start, stop - start), dtype='str'))
+
+
+def _normalize_partition(task):
+    """Normalised columns and partial counts for one partition; inputs are views on shared memory"""
+    handles = []
+    normalized = {}
+    try:
+        for column, spec in task['hplc'].items():
+            shm, values = _attach(spec, task['start'], task['stop'])
+            handles.append(shm)
+            output, normalize = HPLC_COLUMNS[column]
+            result = normalize(values, task['age_bin_edges'])
+            normalized.update(result if output is None else {output: result})
+            del values
+
+        hpos = None
+        if task.get('hpos') is not None:
+            spec, start, stop = task['hpos']
+            shm, ratios = _attach(spec, start, stop)
+            handles.append(shm)
+            hpos = _threshold_counts(ratios.to_numpy(), *task['thresholds'])
+            del ratios
+    finally:
+        for shm in handles:
+            with contextlib.suppress(BufferError):  # views still held by an in-flight exception
+                shm.close()
+
+    partial = {
+        AGGREGATE_NAMES[col]: _count_labels(values)
+        for col, values in normalized.items() if col in AGGREGATE_NAMES
+    }
+    if hpos is not None:
+        partial['hpos'] = hpos
+    return normalized, partial
+
+
+def _count_labels(categorical):
+    counts = pd.Series(categorical).value_counts(sort=False)
+    return {label: int(n) for label, n in counts.items() if n}
+
+
+def _threshold_counts(ratios, low, high):
+    valid = ~np.isnan(ratios)
+    return {
+        'below': int((ratios < low).sum()),
+        'within': int(((ratios >= low) & (ratios <= high)).sum()),
+        'above': int((ratios > high).sum()),
+        'invalid': int((~valid).sum()),
+    }
+
+
+def _ranges(n_rows, n_parts, boundaries=None):
+    """Split [0, n_rows) into n_parts contiguous ranges, snapping to group boundaries if given"""
+    cuts = np.linspace(0, n_rows, n_parts + 1).astype(int)
+    if boundaries is not None and len(boundaries):
+        snapped = boundaries[np.clip(np.searchsorted(boundaries, cuts[1:-1]), 0, len(boundaries) - 1)]
+        cuts = np.unique(np.concatenate([[0], snapped, [n_rows]]))
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def _merge(partials):
+    merged = {}
+    for partial in partials:
+        for name, counts in partial.items():
+            bucket = merged.setdefault(name, {})
+            for label, n in counts.items():
+                bucket[label] = bucket.get(label, 0) + n
+    return merged
+
+
+def _concat(parts):
+    if isinstance(parts[0], pd.Categorical):
+        return union_categoricals(parts)
+    return np.concatenate(parts)
+
+
+def process_datasets(hplc_data, hpos_data=None, thresholds=(0.38, 0.42), workers=None,
+                     partition_by='rows', age_bin_edges=DEFAULT_AGE_BIN_EDGES):
+    """Normalised HPLC columns plus dashboard counts, computed in parallel
+
+    Returns ``(normalized, aggregates)``. ``normalized`` is aligned with
+    hplc_data and holds Gender_standardized, District, age_in_years,
+    age_group and the result class columns for whichever source columns
+    exist. ``aggregates`` holds gender/district/result_mix/age_group counts
+    and the HPOS threshold buckets.
+
+    ``partition_by='district'`` sorts rows by district first (one serial
+    pass in the parent) so every worker owns whole districts; the default
+    splits by row ranges. ``workers=1`` runs in-process with the same code
+    path, which is what small datasets use.
+    """
+    workers = workers or os.cpu_count() or 1
+    columns = [col for col in HPLC_COLUMNS if col in hplc_data.columns]
+
+    order = boundaries = None
+    if partition_by == 'district' and 'District' in hplc_data.columns:
+        district_codes = pd.factorize(hplc_data['District'], use_na_sentinel=True)[0]
+        order = np.argsort(district_codes, kind='stable')
+        boundaries = np.flatnonzero(np.diff(district_codes[order])) + 1
+
+    ratios = None
+    if hpos_data is not None and 'deviceRatio' in hpos_data.columns:
+        ratios = pd.to_numeric(hpos_data['deviceRatio'], errors='coerce').to_numpy(dtype=np.float64)
+
+    segments = {}
+    hpos_segment = None
+    try:
+        for col in columns:
+            segments[col] = _column_to_shared(hplc_data[col], order)
+        hpos_segment = _to_shared(ratios) if ratios is not None else None
+
+        hplc_ranges = _ranges(len(hplc_data), workers, boundaries)
+        hpos_ranges = _ranges(len(ratios), workers) if ratios is not None else []
+        tasks = []
+        for i in range(max(len(hplc_ranges), len(hpos_ranges))):
+            task = {'hplc': {}, 'start': 0, 'stop': 0, 'hpos': None,
+                    'thresholds': thresholds, 'age_bin_edges': tuple(age_bin_edges)}
+            if i < len(hplc_ranges):
+                task['start'], task['stop'] = hplc_ranges[i]
+                task['hplc'] = {col: spec for col, (_, spec) in segments.items()}
+            if i < len(hpos_ranges):
+                task['hpos'] = (hpos_segment[1], *hpos_ranges[i])
+            tasks.append(task)
+
+        if workers == 1:
+            results = [_normalize_partition(task) for task in tasks]
+        else:
+            results = list(_get_pool(workers).map(_normalize_partition, tasks))
+    finally:
+        for shm, _ in segments.values():
+            shm.close()
+            shm.unlink()
+        if hpos_segment is not None:
+            hpos_segment[0].close()
+            hpos_segment[0].unlink()
+
+    pieces = [normalized for normalized, _ in results if normalized]
+    normalized = pd.DataFrame(index=hplc_data.index)
+    if pieces:
+        inverse = None
+        if order is not None:
+            inverse = np.empty_like(order)
+            inverse[order] = np.arange(len(order))
+        for col in pieces[0]:
+            values = _concat([piece[col] for piece in pieces])
+            normalized[col] = values if inverse is None else values.take(inverse)
+
+    merged = _merge(partial for _, partial in results)
+    aggregates = {
+        name: pd.Series(merged.get(name, {}), dtype=int).sort_values(ascending=False)
+        for name in ('gender', 'district', 'result_mix')
+    }
+    aggregates['result_mix'] = aggregates['result_mix'].reindex(RESULT_CATEGORIES, fill_value=0)
+    age_labels = get_age_binner(tuple(age_bin_edges)).labels
+    aggregates['age_group'] = pd.Series(merged.get('age_group', {}), dtype=int).reindex(age_labels, fill_value=0)
+    aggregates['hpos'] = {bucket: merged.get('hpos', {}).get(bucket, 0) for bucket in HPOS_BUCKETS}
+    return normalized, aggregates
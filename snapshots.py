@@ -0,0 +1,344 @@
+"""Versioned snapshots of the HPLC sheet with row-level diffs and a change feed
+
+Rows are keyed by Sickle Id and fingerprinted with vectorised hashes, so a
+diff between two versions is a handful of array operations. Only the newest
+versions keep full frames and per-cell hashes; older ones are compacted to
+keys plus row fingerprints and thinned by age, so "since yesterday" and
+"last 7 days" stay answerable without keeping every hourly reload.
+"""
+import copy
+import hashlib
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMN = 'Sickle Id'
+FALLBACK_KEY_COLUMN = 'SL No.'
+
+
+def snapshot_keys(df, fingerprints, key_column=KEY_COLUMN, fallback_column=FALLBACK_KEY_COLUMN):
+    """Unique row keys: Sickle Id, else SL No., else the row fingerprint; repeats get a #n suffix"""
+    keys = pd.Series(pd.NA, index=df.index, dtype='string')
+    if key_column in df.columns:
+        keys = df[key_column].astype('string').str.strip().str.upper().replace('', pd.NA)
+    if fallback_column in df.columns:
+        fallback = 'SL:' + pd.to_numeric(df[fallback_column], errors='coerce').astype('Int64').astype('string')
+        keys = keys.fillna(fallback)
+    missing = keys.isna().to_numpy()
+    if missing.any():
+        keys[missing] = [f'ROW:{fp:016x}' for fp in fingerprints[missing]]
+    repeat = keys.groupby(keys, sort=False).cumcount()
+    dup = (repeat > 0).to_numpy()
+    if dup.any():
+        keys[dup] = keys[dup] + '#' + (repeat[dup] + 1).astype('string')
+    return pd.Index(keys.to_numpy(dtype=object), name='Key')
+
+
+def cell_hashes(df):
+    """uint64 hash per cell; numeric columns are hashed as float64 so int/float drift between loads is ignored"""
+    columns = []
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            values = values.astype(np.float64)
+        columns.append(pd.util.hash_pandas_object(values, index=False).to_numpy())
+    return np.column_stack(columns) if columns else np.empty((len(df), 0), dtype=np.uint64)
+
+
+def frame_digest(df):
+    """Digest of every cell, index and column name; changes on any single-cell edit"""
+    hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    digest = hashlib.blake2b(hashes.tobytes(), digest_size=16)
+    digest.update('\x1f'.join(map(str, df.columns)).encode())
+    return digest.hexdigest()
+
+
+def row_fingerprints(cells):
+    """Combine a row's cell hashes into one uint64, position-sensitive across columns"""
+    if cells.shape[1] == 0:
+        return np.zeros(len(cells), dtype=np.uint64)
+    weights = (np.arange(cells.shape[1], dtype=np.uint64) * np.uint64(2) + np.uint64(1)) * np.uint64(0x9E3779B97F4A7C15)
+    with np.errstate(over='ignore'):
+        return np.bitwise_xor.reduce(cells * weights, axis=1)
+
+
+class Snapshot:
+    """One data version; ``frame`` and ``cells`` are dropped when compacted"""
+
+    def __init__(self, version, created_at, df, key_column=KEY_COLUMN):
+        self.version = version
+        self.created_at = created_at
+        self.columns = list(df.columns)
+        self.n_rows = len(df)
+        self.cells = cell_hashes(df)
+        self.rows = row_fingerprints(self.cells)
+        self.keys = snapshot_keys(df, self.rows, key_column)
+        self.frame = df
+
+    @property
+    def is_compact(self):
+        return self.frame is None
+
+    def compact(self):
+        self.cells = None
+        self.frame = None
+
+    def same_content(self, other):
+        return self.columns == other.columns and self.keys.equals(other.keys) and np.array_equal(self.rows, other.rows)
+
+
+class ChangeSet:
+    """Row- and cell-level differences between two snapshots
+
+    ``old_rows``/``new_rows`` hold the removed+modified rows before and the
+    added+modified rows after the change, which is what incremental
+    aggregates need. They are None when the older snapshot was compacted
+    (``complete`` is False), in which case consumers should rebuild.
+    ``modified`` is None when it cannot be known: a compacted snapshot only
+    has whole-row fingerprints, which cannot be compared once columns change.
+    """
+
+    def __init__(self, old, new, added, removed, modified, modified_cells, old_rows, new_rows):
+        self.from_version = old.version
+        self.to_version = new.version
+        self.from_time = old.created_at
+        self.to_time = new.created_at
+        self.added = added
+        self.removed = removed
+        self.modified = modified
+        self.modified_cells = modified_cells
+        self.old_rows = old_rows
+        self.new_rows = new_rows
+
+    @property
+    def complete(self):
+        return self.old_rows is not None and self.new_rows is not None
+
+    @property
+    def is_empty(self):
+        return self.modified is not None and not (len(self.added) or len(self.removed) or len(self.modified))
+
+    def summary(self):
+        return {
+            'From Version': self.from_version,
+            'To Version': self.to_version,
+            'From Captured': self.from_time,
+            'To Captured': self.to_time,
+            'Added': len(self.added),
+            'Removed': len(self.removed),
+            'Modified Rows': len(self.modified) if self.modified is not None else None,
+            'Modified Cells': len(self.modified_cells),
+        }
+
+
+def diff_snapshots(old, new):
+    """Vectorised diff of two snapshots keyed by row key"""
+    added = new.keys.difference(old.keys, sort=False)
+    removed = old.keys.difference(new.keys, sort=False)
+    common = new.keys.intersection(old.keys, sort=False)
+    old_pos = old.keys.get_indexer(common)
+    new_pos = new.keys.get_indexer(common)
+
+    if old.columns == new.columns:
+        changed = old.rows[old_pos] != new.rows[new_pos]
+    elif not (old.is_compact or new.is_compact):
+        old_idx, new_idx = _shared_column_positions(old, new)
+        changed = (old.cells[old_pos][:, old_idx] != new.cells[new_pos][:, new_idx]).any(axis=1)
+    else:
+        # Whole-row fingerprints over different columns say nothing about individual rows
+        empty_cells = pd.DataFrame(columns=['Key', 'Column', 'Old Value', 'New Value'])
+        return ChangeSet(old, new, added, removed, None, empty_cells, None, None)
+    modified = common[changed]
+    old_changed, new_changed = old_pos[changed], new_pos[changed]
+
+    modified_cells = pd.DataFrame(columns=['Key', 'Column', 'Old Value', 'New Value'])
+    old_rows = new_rows = None
+    if not old.is_compact:
+        modified_cells = _cell_changes(old, new, modified, old_changed, new_changed)
+        old_rows = pd.concat([
+            old.frame.iloc[old.keys.get_indexer(removed)],
+            old.frame.iloc[old_changed],
+        ])
+    if not new.is_compact:
+        new_rows = pd.concat([
+            new.frame.iloc[new.keys.get_indexer(added)],
+            new.frame.iloc[new_changed],
+        ])
+    return ChangeSet(old, new, added, removed, modified, modified_cells, old_rows, new_rows)
+
+
+def _shared_column_positions(old, new):
+    shared = [col for col in new.columns if col in old.columns]
+    return [old.columns.index(col) for col in shared], [new.columns.index(col) for col in shared]
+
+
+def _cell_changes(old, new, modified, old_pos, new_pos):
+    """(Key, Column, Old Value, New Value) for every differing cell among modified rows"""
+    shared = [col for col in new.columns if col in old.columns]
+    old_idx, new_idx = _shared_column_positions(old, new)
+    differs = old.cells[old_pos][:, old_idx] != new.cells[new_pos][:, new_idx]
+    rows, cols = np.nonzero(differs)
+
+    shared_cols = np.asarray(shared, dtype=object)
+    old_values = old.frame.iloc[old_pos][shared].to_numpy(dtype=object)
+    new_values = new.frame.iloc[new_pos][shared].to_numpy(dtype=object)
+    return pd.DataFrame({
+        'Key': modified[rows],
+        'Column': shared_cols[cols],
+        'Old Value': old_values[rows, cols],
+        'New Value': new_values[rows, cols],
+    })
+
+
+class SnapshotStore:
+    """Age-bounded history of snapshots plus the change feed between consecutive versions
+
+    Every version from the last ``keep_all_within`` is kept. Older ones are
+    thinned to the newest per calendar day, so a comparison further back is
+    at worst against the end of the previous day. Versions past
+    ``retention`` are dropped except the newest of them, which still
+    describes the data as of the retention cutoff.
+
+    ``commit`` compacts older snapshots in place, so readers pick snapshots
+    under the lock and work on shallow copies that keep their frames.
+    """
+
+    def __init__(self, key_column=KEY_COLUMN, retention=timedelta(days=8), keep_all_within=timedelta(days=2),
+                 full_versions=2, max_feed=50):
+        self.key_column = key_column
+        self.retention = retention
+        self.keep_all_within = keep_all_within
+        self.full_versions = full_versions
+        self.snapshots = deque()
+        self.feed = deque(maxlen=max_feed)
+        self._next_version = 1
+        self._lock = threading.Lock()
+
+    @property
+    def latest(self):
+        return self.snapshots[-1] if self.snapshots else None
+
+    def pinned_latest(self):
+        """Copy of the latest snapshot taken under the lock (None if empty)"""
+        with self._lock:
+            return copy.copy(self.latest) if self.snapshots else None
+
+    def commit(self, df, created_at=None):
+        """Record df as a new version unless it matches the latest; returns the current snapshot"""
+        with self._lock:
+            snapshot = Snapshot(self._next_version, created_at or datetime.now(), df, self.key_column)
+            latest = self.latest
+            if latest is not None and latest.same_content(snapshot):
+                return latest
+            if latest is not None:
+                self.feed.append(diff_snapshots(latest, snapshot))
+            self.snapshots.append(snapshot)
+            self._next_version += 1
+            for older in list(self.snapshots)[:-self.full_versions]:
+                older.compact()
+            self._expire(snapshot.created_at)
+            return snapshot
+
+    def _expire(self, now):
+        kept, days_kept, past_retention = [], set(), False
+        for snapshot in reversed(self.snapshots):  # newest first
+            age = now - snapshot.created_at
+            if snapshot is self.latest or age <= self.keep_all_within:
+                kept.append(snapshot)
+            elif age <= self.retention:
+                if snapshot.created_at.date() not in days_kept:
+                    days_kept.add(snapshot.created_at.date())
+                    kept.append(snapshot)
+            elif not past_retention:
+                past_retention = True
+                kept.append(snapshot)
+        self.snapshots = deque(reversed(kept))
+
+    def changes_since(self, version):
+        """Change sets after ``version`` in order, or None if the feed no longer reaches back that far"""
+        with self._lock:
+            if self.latest is None or version == self.latest.version:
+                return []
+            changes = [change for change in self.feed if change.from_version >= version]
+            if not changes or changes[0].from_version != version:
+                return None
+            return changes
+
+    def snapshot_before(self, when):
+        """Latest snapshot taken at or before ``when`` (the oldest kept one if none is)
+
+        Returns a copy pinned under the lock, so a concurrent commit that
+        compacts the stored snapshot cannot drop its frame mid-read.
+        """
+        with self._lock:
+            base = self._snapshot_before(when)
+            return copy.copy(base) if base is not None else None
+
+    def _snapshot_before(self, when):
+        candidates = [s for s in self.snapshots if s.created_at <= when]
+        return candidates[-1] if candidates else (self.snapshots[0] if self.snapshots else None)
+
+    def diff_since(self, when):
+        """What changed between the data as of ``when`` and the latest version
+
+        The base may be newer than ``when`` if no kept version is that old;
+        check ``from_time`` on the result before labelling it.
+        """
+        with self._lock:
+            base, latest = self._snapshot_before(when), self.latest
+            if base is None or base is latest:
+                return None
+            # Pin frame/cells references; the diff itself runs outside the lock
+            base, latest = copy.copy(base), copy.copy(latest)
+        return diff_snapshots(base, latest)
+
+    def versions(self):
+        with self._lock:
+            rows = [{
+                'Version': s.version,
+                'Captured': s.created_at.strftime('%Y-%m-%d %H:%M'),
+                'Rows': s.n_rows,
+                'Columns': len(s.columns),
+                'Full Copy': not s.is_compact,
+            } for s in reversed(self.snapshots)]
+        return pd.DataFrame(rows, columns=['Version', 'Captured', 'Rows', 'Columns', 'Full Copy'])
+
+
+class FeedConsumer:
+    """Keeps a derived aggregate current by replaying the store's change feed
+
+    ``build(frame)`` creates the aggregate from scratch; ``apply(state, change)``
+    folds one complete ChangeSet in. Falls back to ``build`` when the feed has
+    gaps or a change set lacks row data. Changes are applied to a copy and
+    swapped in, so readers of the previous state never see a half-applied one.
+    """
+
+    def __init__(self, build, apply):
+        self.build = build
+        self.apply = apply
+        self.state = None
+        self.version = None
+        self._lock = threading.Lock()
+
+    def sync(self, store):
+        with self._lock:
+            latest = store.pinned_latest()
+            if latest is None:
+                return self.state
+            if self.state is not None and self.version == latest.version:
+                return self.state
+            changes = store.changes_since(self.version) if self.state is not None else None
+            if changes is None or not all(change.complete for change in changes):
+                self.state = self.build(latest.frame)
+                self.version = latest.version
+            else:
+                state = copy.deepcopy(self.state)
+                for change in changes:
+                    state = self.apply(state, change)
+                self.state = state
+                # A commit may have landed after latest was pinned
+                self.version = changes[-1].to_version if changes else latest.version
+            return self.state
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from age_bins import UNKNOWN_AGE, AgeBinner, get_age_binner, parse_ages
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('11', 11.0),
+    ('11 yrs', 11.0),
+    ('10yrs', 10.0),
+    ('18 Y', 18.0),
+    ('6 months', 0.5),
+    ('3mo', 0.25),
+    ('2y3m', 2.25),
+    ('2y 3m', 2.25),
+    ('2 years 6 months', 2.5),
+    ('1.5', 1.5),
+    ('0', 0.0),
+    ('120', 120.0),
+    ('121', None),
+    ('-4', None),
+    ('abc', None),
+    (None, None),
+])
+def test_parse_ages(text, expected):
+    parsed = parse_ages(pd.Series([text], dtype=object)).iloc[0]
+    if expected is None:
+        assert np.isnan(parsed)
+    else:
+        assert parsed == pytest.approx(expected)
+
+
+def test_parse_ages_keeps_the_index():
+    parsed = parse_ages(pd.Series(['5', '5', None], index=[7, 8, 9]))
+    assert list(parsed.index) == [7, 8, 9]
+    assert parsed.name == 'age_in_years'
+
+
+@pytest.mark.parametrize('years, expected', [
+    (0, '0-4'),
+    (4.99, '0-4'),
+    (5, '5-9'),
+    (79.9, '75-79'),
+    (80, '80+'),
+    (119, '80+'),
+    (np.nan, UNKNOWN_AGE),
+    (-1, UNKNOWN_AGE),
+])
+def test_assign(years, expected):
+    assert get_age_binner().assign(np.array([years])).tolist() == [expected]
+
+
+def test_assign_series_keeps_index_and_every_label():
+    binner = get_age_binner()
+    groups = binner.assign(pd.Series([1.0, np.nan], index=[5, 6]))
+
+    assert list(groups.index) == [5, 6]
+    assert list(groups.cat.categories) == binner.labels
+    assert binner.counts(groups).sum() == 2
+
+
+def test_edges_must_increase():
+    with pytest.raises(ValueError):
+        AgeBinner((0, 10, 10))
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from hplc_results import NOT_REPORTED, RESULT_CATEGORIES, UNRECOGNIZED, classify_result, classify_results, unrecognized_results
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('HbS Trait', 'HbAS'),
+    ('Hb S trait', 'HbAS'),
+    ('Sickle Cell Trait ', 'HbAS'),
+    ('sickle trait', 'HbAS'),
+    ('HbAS', 'HbAS'),
+    ('AS', 'HbAS'),
+    ('Carrier', 'HbAS'),
+    ('Sickle-beta thalassemia', 'HbS-Beta Thal'),
+    ('Sickle beta thal', 'HbS-Beta Thal'),
+    ('Thal-Sickle', 'HbS-Beta Thal'),
+    ('S-beta thal', 'HbS-Beta Thal'),
+    ('HbS/beta', 'HbS-Beta Thal'),
+    ('Sickle Cell Disease', 'HbSS'),
+    ('Sickle cell anaemia', 'HbSS'),
+    ('HbSS', 'HbSS'),
+    ('SS', 'HbSS'),
+    ('Normal study', 'Normal'),
+    ('HbAA', 'Normal'),
+    ('Beta thal trait', 'Other Variant'),
+    ('HbE', 'Other Variant'),
+    ('Hb D Punjab', 'Other Variant'),
+    ('Re-sample', 'Invalid'),
+    ('Clotted', 'Invalid'),
+    ('Haemolysed', 'Invalid'),
+    ('', NOT_REPORTED),
+    ('  NA ', NOT_REPORTED),
+    ('-', NOT_REPORTED),
+    ('pending review', UNRECOGNIZED),
+])
+def test_classify_result(text, expected):
+    assert classify_result(text) == expected
+
+
+def test_classify_results_broadcasts_and_marks_missing_not_reported():
+    series = pd.Series(['HbS Trait', None, 'pending', 'Normal', 'HbS Trait'], index=[10, 11, 12, 13, 14])
+
+    classes = classify_results(series)
+
+    assert classes.tolist() == ['HbAS', NOT_REPORTED, UNRECOGNIZED, 'Normal', 'HbAS']
+    assert list(classes.index) == [10, 11, 12, 13, 14]
+    assert list(classes.cat.categories) == RESULT_CATEGORIES
+
+
+def test_unrecognized_results_counts_stripped_text():
+    series = pd.Series(['pending', 'pending ', 'Normal', None])
+    assert unrecognized_results(series).to_dict('records') == [{'Result Text': 'pending', 'Count': 2}]
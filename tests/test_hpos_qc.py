@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from hpos_qc import QCEngine
+
+
+def make_feed(n_rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'deviceId': rng.choice(['D1', 'D2'], n_rows),
+        'labName': 'Lab A',
+        'deviceRatio': rng.normal(0.40, 0.01, n_rows),
+    })
+
+
+class TestQCEngineUpdate:
+    def test_consumes_only_appended_rows(self):
+        engine = QCEngine()
+        feed = make_feed()
+        assert engine.update(feed.iloc[:300]) == 300
+        assert engine.update(feed) == 100
+        assert engine.update(feed) == 0
+
+    def test_same_data_version_is_skipped(self):
+        engine = QCEngine()
+        feed = make_feed()
+        engine.update(feed, data_version='v1')
+        assert engine.update(feed, data_version='v1') == 0
+
+    def test_corrected_earlier_reading_replays_the_feed(self):
+        engine = QCEngine()
+        feed = make_feed()
+        engine.update(feed, data_version='v1')
+
+        corrected = feed.copy()
+        corrected.loc[10, 'deviceRatio'] = 0.90
+
+        assert engine.update(corrected, data_version='v2') == len(feed)
+        assert engine.rows_consumed == len(feed)
+
+    def test_edits_outside_the_qc_columns_do_not_reset(self):
+        engine = QCEngine()
+        feed = make_feed()
+        engine.update(feed)
+        assert engine.update(feed.assign(comment='rechecked')) == 0
@@ -0,0 +1,229 @@
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from snapshots import FeedConsumer, Snapshot, SnapshotStore, diff_snapshots
+
+T0 = datetime(2024, 1, 1, 9, 0)
+
+
+def make_frame(**overrides):
+    frame = pd.DataFrame({
+        'SL No.': [1, 2, 3, 4],
+        'Sickle Id': ['SK01', 'SK02', 'SK03', 'SK04'],
+        'District': ['Mysuru', 'Mysuru', 'Kodagu', 'Kodagu'],
+        'Age': ['11', '12 yrs', '30', '45'],
+    })
+    for column, values in overrides.items():
+        frame[column] = values
+    return frame
+
+
+def snapshot(df, version=1, when=T0):
+    return Snapshot(version, when, df)
+
+
+def count_by_district(frame):
+    return frame['District'].value_counts().to_dict()
+
+
+def apply_district_counts(state, change):
+    for district, n in change.old_rows['District'].value_counts().items():
+        state[district] -= n
+    for district, n in change.new_rows['District'].value_counts().items():
+        state[district] = state.get(district, 0) + n
+    return {k: v for k, v in state.items() if v}
+
+
+class TestDiffSnapshots:
+    def test_added_removed_and_modified_cells(self):
+        old = make_frame()
+        new = make_frame().drop(index=3)
+        new.loc[1, 'Age'] = '13 yrs'
+        new = pd.concat([new, pd.DataFrame([{'SL No.': 5, 'Sickle Id': 'SK05', 'District': 'Mandya', 'Age': '8'}])],
+                        ignore_index=True)
+
+        change = diff_snapshots(snapshot(old), snapshot(new, 2))
+
+        assert list(change.added) == ['SK05']
+        assert list(change.removed) == ['SK04']
+        assert list(change.modified) == ['SK02']
+        assert change.modified_cells.to_dict('records') == [
+            {'Key': 'SK02', 'Column': 'Age', 'Old Value': '12 yrs', 'New Value': '13 yrs'}
+        ]
+        assert change.complete
+        assert sorted(change.old_rows['Sickle Id']) == ['SK02', 'SK04']
+        assert sorted(change.new_rows['Sickle Id']) == ['SK02', 'SK05']
+
+    def test_identical_frames_are_empty(self):
+        change = diff_snapshots(snapshot(make_frame()), snapshot(make_frame(), 2))
+        assert change.is_empty
+        assert change.summary()['Modified Rows'] == 0
+
+    def test_row_order_and_int_float_drift_are_not_changes(self):
+        old = make_frame()
+        new = make_frame().iloc[::-1].reset_index(drop=True)
+        new['SL No.'] = new['SL No.'].astype(float)
+        assert diff_snapshots(snapshot(old), snapshot(new, 2)).is_empty
+
+    def test_added_column_compares_shared_columns_of_full_snapshots(self):
+        old = make_frame()
+        new = make_frame(Village=['A', 'B', 'C', 'D'])
+        new.loc[0, 'District'] = 'Mandya'
+
+        change = diff_snapshots(snapshot(old), snapshot(new, 2))
+
+        assert list(change.modified) == ['SK01']
+        assert change.modified_cells['Column'].tolist() == ['District']
+
+    def test_added_column_against_compacted_base_leaves_modified_unknown(self):
+        base = snapshot(make_frame())
+        base.compact()
+        new = make_frame(Village=['A', 'B', 'C', 'D']).iloc[:3]
+
+        change = diff_snapshots(base, snapshot(new, 2))
+
+        assert change.modified is None
+        assert change.summary()['Modified Rows'] is None
+        assert list(change.removed) == ['SK04']
+        assert not change.is_empty
+        assert not change.complete
+
+    def test_compacted_base_with_same_columns_still_counts_modified_rows(self):
+        base = snapshot(make_frame())
+        base.compact()
+        new = make_frame()
+        new.loc[2, 'Age'] = '31'
+
+        change = diff_snapshots(base, snapshot(new, 2))
+
+        assert list(change.modified) == ['SK03']
+        assert change.modified_cells.empty
+        assert not change.complete
+
+    def test_rows_without_sickle_id_fall_back_to_sl_no(self):
+        old = make_frame(**{'Sickle Id': ['SK01', None, 'SK03', 'SK04']})
+        new = old.copy()
+        new.loc[1, 'Age'] = '14'
+
+        change = diff_snapshots(snapshot(old), snapshot(new, 2))
+
+        assert list(change.modified) == ['SL:2']
+        assert not len(change.added) and not len(change.removed)
+
+
+class TestSnapshotStore:
+    def test_unchanged_commit_keeps_the_current_version(self):
+        store = SnapshotStore()
+        first = store.commit(make_frame(), T0)
+        assert store.commit(make_frame(), T0 + timedelta(hours=1)) is first
+        assert len(store.feed) == 0
+
+    def test_only_newest_versions_keep_full_copies(self):
+        store = SnapshotStore(full_versions=2)
+        for hour in range(4):
+            store.commit(make_frame(Age=[str(hour)] * 4), T0 + timedelta(hours=hour))
+        assert [s.is_compact for s in store.snapshots] == [True, True, False, False]
+
+    def test_hourly_history_still_reaches_back_seven_days(self):
+        store = SnapshotStore()
+        for hour in range(24 * 10):
+            store.commit(make_frame(Age=[str(hour)] * 4), T0 + timedelta(hours=hour))
+        now = store.latest.created_at
+
+        week_ago = now - timedelta(days=7)
+        base = store.snapshot_before(week_ago)
+        assert base.created_at <= week_ago < base.created_at + timedelta(days=1)
+        assert store.snapshot_before(now - timedelta(days=1)).created_at == now - timedelta(days=1)
+        # 49 from the last two days, the newest per day after that, plus the retention anchor
+        assert len(store.snapshots) <= 49 + 8 + 1
+
+    def test_diff_since_reports_the_base_it_used(self):
+        store = SnapshotStore()
+        store.commit(make_frame(), T0)
+        store.commit(make_frame(Age=['1'] * 4), T0 + timedelta(hours=2))
+
+        change = store.diff_since(T0 + timedelta(hours=2) - timedelta(days=7))
+
+        assert change.from_version == 1
+        assert change.from_time == T0
+
+    def test_changes_since_detects_gaps(self):
+        store = SnapshotStore(max_feed=2)
+        for hour in range(4):
+            store.commit(make_frame(Age=[str(hour)] * 4), T0 + timedelta(hours=hour))
+        assert store.changes_since(4) == []
+        assert [c.from_version for c in store.changes_since(2)] == [2, 3]
+        assert store.changes_since(1) is None
+
+    def test_readers_survive_concurrent_commits(self):
+        store = SnapshotStore(full_versions=1)
+        store.commit(make_frame(), T0)
+        errors = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                try:
+                    store.diff_since(T0)
+                    store.versions()
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        for hour in range(1, 40):
+            store.commit(make_frame(Age=[str(hour)] * 4), T0 + timedelta(minutes=hour))
+        done.set()
+        for reader in readers:
+            reader.join()
+
+        assert errors == []
+
+
+class TestFeedConsumer:
+    def test_incremental_updates_match_a_rebuild(self):
+        store = SnapshotStore()
+        consumer = FeedConsumer(count_by_district, apply_district_counts)
+        frame = make_frame()
+        store.commit(frame, T0)
+        assert consumer.sync(store) == {'Mysuru': 2, 'Kodagu': 2}
+
+        frame = frame.drop(index=0)
+        frame.loc[2, 'District'] = 'Mandya'
+        store.commit(frame, T0 + timedelta(hours=1))
+
+        assert consumer.sync(store) == count_by_district(frame)
+        assert consumer.version == store.latest.version
+
+    def test_applies_to_a_copy(self):
+        store = SnapshotStore()
+        consumer = FeedConsumer(count_by_district, apply_district_counts)
+        store.commit(make_frame(), T0)
+        before = consumer.sync(store)
+        store.commit(make_frame(District=['Mandya'] * 4), T0 + timedelta(hours=1))
+
+        after = consumer.sync(store)
+
+        assert before == {'Mysuru': 2, 'Kodagu': 2}
+        assert after == {'Mandya': 4}
+
+    def test_rebuilds_when_the_feed_has_a_gap(self):
+        store = SnapshotStore(max_feed=1)
+        calls = []
+
+        def build(frame):
+            calls.append(len(frame))
+            return count_by_district(frame)
+
+        consumer = FeedConsumer(build, apply_district_counts)
+        store.commit(make_frame(), T0)
+        consumer.sync(store)
+        store.commit(make_frame(Age=['1'] * 4), T0 + timedelta(hours=1))
+        store.commit(make_frame(District=['Mandya'] * 4), T0 + timedelta(hours=2))
+
+        assert consumer.sync(store) == {'Mandya': 4}
+        assert calls == [4, 4]